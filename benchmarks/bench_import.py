@@ -0,0 +1,59 @@
+"""
+benchmark import times of pyadds modules using `python -X importtime`
+
+    python -m benchmarks.bench_import
+"""
+import subprocess
+import sys
+
+heavy = ['asyncio', 'multiprocessing', 'inspect', 'weakref', 'numpy',
+         'logging.handlers', 'json', 'tracemalloc']
+
+imports = ['pyadds', 'from pyadds import Anything', 'pyadds.str',
+           'from pyadds import uncamel', 'pyadds.cooptypes', 'pyadds.timing',
+           'pyadds.logging', 'pyadds.meta.ops', 'pyadds.annotate',
+           'pyadds.observe', 'pyadds.forkbug', 'pyadds.spawn']
+
+
+def importtime(stmt, repeat=5):
+    """ cumulative import time in us and imported modules of a statement """
+    if stmt.startswith('pyadds'):
+        stmt = 'import ' + stmt
+    best, modules = None, []
+    for _ in range(repeat):
+        proc = subprocess.run([sys.executable, '-X', 'importtime', '-c', stmt],
+                              stderr=subprocess.PIPE, universal_newlines=True)
+        if proc.returncode:
+            return None, []
+        total = 0
+        modules = []
+        for line in proc.stderr.splitlines():
+            if not line.startswith('import time:') or '|' not in line:
+                continue
+            _, cumulative, name = line.split('|')
+            modules.append(name.strip())
+            # top level imports of the statement are not indented
+            if not name.startswith('  '):
+                try:
+                    total += int(cumulative)
+                except ValueError:
+                    pass
+        best = total if best is None else min(best, total)
+    return best, modules
+
+
+def main():
+    base, startup = importtime('pass')
+    print('{:<30} {:>8}us (subtracted below)'.format('interpreter startup', base))
+    for stmt in imports:
+        took, modules = importtime(stmt)
+        if took is None:
+            print('{:<30} {:>10}'.format(stmt, 'fails'))
+            continue
+        loaded = [m for m in heavy if m in modules and m not in startup]
+        print('{:<30} {:>8}us  {}'.format(stmt, took - base,
+                                          ', '.join(loaded)))
+
+
+if __name__ == '__main__':
+    main()
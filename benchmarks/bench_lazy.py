@@ -0,0 +1,69 @@
+"""
+benchmark lazy log arguments for disabled levels and multiple handlers
+
+    python -m benchmarks.bench_lazy
+"""
+import logging
+import time
+
+from pyadds.logging import lazy, fields, record_fields
+
+
+class recomputed(tuple):
+    """ lazy argument without memoization, as before """
+    def __new__(cls, lam):
+        return super().__new__(cls, (lam,))
+
+    def __str__(self):
+        lam, = self
+        return str(lam())
+
+
+class NullFormatting(logging.Handler):
+    """ handler formatting records without any i/o """
+    def emit(self, record):
+        self.format(record)
+
+
+class NullStructured(logging.Handler):
+    """ handler taking the structured fields, like a json handler would """
+    def emit(self, record):
+        record_fields(record)
+
+
+def summary(data=list(range(1000))):
+    return sum(data) / len(data)
+
+
+def bench(name, f, n):
+    start = time.perf_counter()
+    for _ in range(n):
+        f()
+    took = time.perf_counter() - start
+    print('{:<40} {:>8.0f} ns/call'.format(name, took / n * 1e9))
+
+
+def main(n=20000):
+    logger = logging.getLogger('bench.lazy')
+    logger.propagate = False
+
+    logger.setLevel(logging.INFO)
+    print('disabled level')
+    bench('eager argument', lambda: logger.debug('%s', summary()), n)
+    bench('lazy argument', lambda: logger.debug('%s', lazy(summary)), n)
+    bench('lazy fields', lambda: logger.debug(
+        'summary', extra=fields(summary=summary)), n)
+
+    for handlers in [1, 4]:
+        logger.handlers = ([NullFormatting() for _ in range(handlers)] +
+                           [NullStructured()])
+        print('{} formatting handlers and a structured one'.format(handlers))
+        bench('recomputed argument',
+              lambda: logger.info('%s', recomputed(summary)), n)
+        bench('lazy argument', lambda: logger.info('%s', lazy(summary)), n)
+        bench('lazy fields', lambda: logger.info(
+            'summary', extra=fields(summary=summary)), n)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+"""
+benchmark logging throughput of synchronous and queued `@log` classes
+
+    python -m benchmarks.bench_logging
+"""
+import logging
+import tempfile
+import time
+import os
+
+from pyadds.logging import log, queue_logging, stop_queue_logging
+
+
+class FsyncHandler(logging.FileHandler):
+    """ file handler syncing every record to disk, i.e. a slow handler """
+    def flush(self):
+        super().flush()
+        if self.stream:
+            os.fsync(self.stream.fileno())
+
+
+@log
+class SyncWorker:
+    def work(self, i):
+        self.__log.info('working on %d', i)
+
+    def idle(self, i):
+        self.__log.debug('idle on %d', i)
+
+
+@log(queued=True)
+class QueuedWorker:
+    def work(self, i):
+        self.__log.info('working on %d', i)
+
+    def idle(self, i):
+        self.__log.debug('idle on %d', i)
+
+
+def bench(name, f, n):
+    start = time.perf_counter()
+    for i in range(n):
+        f(i)
+    took = time.perf_counter() - start
+    print('{:<30} {:>10.0f} calls/s {:>8.0f} ns/call'.format(
+        name, n / took, took / n * 1e9))
+
+
+def main(n=100000):
+    root = logging.getLogger()
+    root.setLevel(logging.INFO)
+    sync, queued = SyncWorker(), QueuedWorker()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for kind, n in [(logging.FileHandler, n), (FsyncHandler, n // 100)]:
+            handler = kind(os.path.join(tmp, kind.__name__ + '.log'))
+            root.addHandler(handler)
+            print('{} records with {}'.format(n, kind.__name__))
+
+            for overflow in ['block', 'drop']:
+                queue_logging(handler, overflow=overflow)
+                bench('sync, info', sync.work, n)
+                bench('queued ({}), info'.format(overflow), queued.work, n)
+                stop_queue_logging()
+
+            queue_logging(handler)
+            bench('sync, disabled debug', sync.idle, n)
+            bench('queued, disabled debug', queued.idle, n)
+            stop_queue_logging()
+
+            root.removeHandler(handler)
+            handler.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,41 @@
+"""
+benchmark creation of operator forwarding mixins for classes defined at runtime
+
+    python -m benchmarks.bench_ops
+"""
+import timeit
+
+from pyadds.meta.ops import autowraped_ops, iter_ops, invalidate
+from pyadds import ops
+
+
+def runtime_class(i):
+    return type('Num{}'.format(i), (int,), {})
+
+
+def discover(cls):
+    return tuple(iter_ops(cls))
+
+
+def main(number=2000):
+    classes = [runtime_class(i) for i in range(number)]
+    cls = classes[0]
+
+    cases = [
+        ('discovery, uncached', lambda: discover(cls)),
+        ('mixin, new class', lambda: autowraped_ops(next(fresh), by='v')),
+        ('mixin, cached class', lambda: autowraped_ops(cls, by='v')),
+        ('dunder mixin, new class',
+         lambda: ops.autowraped_ops(next(fresh), by='v')),
+        ('dunder mixin, cached class',
+         lambda: ops.autowraped_ops(cls, by='v')),
+    ]
+    for name, case in cases:
+        invalidate()
+        fresh = iter(classes)
+        took = timeit.timeit(case, number=number)
+        print('{:<28} {:>8.2f} us'.format(name, took / number * 1e6))
+
+
+if __name__ == '__main__':
+    main()
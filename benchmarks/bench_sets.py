@@ -0,0 +1,46 @@
+"""
+benchmark the set algebra of pyadds.sets against plain sets
+
+    python -m benchmarks.bench_sets
+"""
+import random
+import timeit
+
+from pyadds.sets import Anything, Symbols
+
+
+def bench(name, f, number):
+    took = min(timeit.repeat(f, number=number, repeat=3))
+    print('{:<40} {:>8.0f} ns/op'.format(name, took / number * 1e9))
+
+
+def main(number=10**5, size=200, subset=20):
+    rnd = random.Random(42)
+    vocabulary = ['cap-{}'.format(i) for i in range(size)]
+    a = frozenset(rnd.sample(vocabulary, subset))
+    b = frozenset(rnd.sample(vocabulary, subset))
+    item = vocabulary[0]
+
+    symbols = Symbols(vocabulary)
+    ba, bb = symbols.set(a), symbols.set(b)
+    ca, cb = Anything - a, Anything - b
+    bca, bcb = ~ba, ~bb
+
+    print('{} elements, sets of {}'.format(size, subset))
+    bench('frozenset &', lambda: a & b, number)
+    bench('bitset &', lambda: ba & bb, number)
+    bench('frozenset |', lambda: a | b, number)
+    bench('bitset |', lambda: ba | bb, number)
+    bench('frozenset <=', lambda: a <= b, number)
+    bench('bitset <=', lambda: ba <= bb, number)
+    bench('frozenset in', lambda: item in a, number)
+    bench('bitset in', lambda: item in ba, number)
+    bench('Anything & frozenset', lambda: Anything & a, number)
+    bench('complement & complement', lambda: ca & cb, number)
+    bench('complement & frozenset', lambda: ca & b, number)
+    bench('bitset complement & complement', lambda: bca & bcb, number)
+    bench('bitset complement & bitset', lambda: bca & bb, number)
+
+
+if __name__ == '__main__':
+    main()
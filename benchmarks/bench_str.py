@@ -0,0 +1,47 @@
+"""
+benchmark identifier conversion of pyadds.str at 10^6 names
+
+    python -m benchmarks.bench_str
+"""
+import random
+import time
+import re
+
+from pyadds.str import uncamel, uncamel_all, name_of
+
+
+def uncompiled(phrase, sep='-'):
+    return re.sub(r'((?<=[a-z])[A-Z0-9]|(?!^)[A-Z0-9](?=[a-z]))',
+                  sep + r'\1', phrase).lower()
+
+
+def names(n, distinct):
+    parts = ['Http', 'Request', 'Header', 'Status', 'Code', 'XML', 'Spawner',
+             'Timing', 'Model', 'View', 'Event', 'Batch', '404', 'Id']
+    rnd = random.Random(42)
+    pool = [''.join(rnd.choice(parts) for _ in range(rnd.randint(1, 4)))
+            + str(i) for i in range(distinct)]
+    return [rnd.choice(pool) for _ in range(n)]
+
+
+def bench(name, f, data):
+    start = time.perf_counter()
+    f(data)
+    took = time.perf_counter() - start
+    print('{:<34} {:>8.3f} s {:>8.0f} ns/name'.format(
+        name, took, took / len(data) * 1e9))
+
+
+def main(n=10**6):
+    for distinct in [100, n]:
+        data = names(n, distinct)
+        print('{} names, {} distinct'.format(n, distinct))
+        uncamel.cache_clear()
+        bench('re.sub per name', lambda d: [uncompiled(p) for p in d], data)
+        bench('uncamel (memoized)', lambda d: [uncamel(p) for p in d], data)
+        bench('name_of (memoized)', lambda d: [name_of(p) for p in d], data)
+        bench('uncamel_all (streaming)', lambda d: list(uncamel_all(d)), data)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,98 @@
+"""
+benchmark the overhead of timing spans
+
+    python -m benchmarks.bench_timing
+"""
+import time
+
+from pyadds.timing import timing, traced, Histogram, Tracer
+
+
+def bench(name, f, n):
+    start = time.perf_counter_ns()
+    f(n)
+    took = time.perf_counter_ns() - start
+    print('{:<30} {:>8.0f} ns/op'.format(name, took / n))
+
+
+def empty(n):
+    for _ in range(n):
+        pass
+
+
+def clock(n, clock=time.perf_counter_ns):
+    for _ in range(n):
+        clock()
+        clock()
+
+
+class Nothing:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, typ, value, tb):
+        pass
+
+
+def context(n):
+    nothing = Nothing()
+    for _ in range(n):
+        with nothing:
+            pass
+
+
+def histogram(n):
+    hist = Histogram()
+    for i in range(n):
+        hist.add(i)
+
+
+def flat(n):
+    with timing() as t:
+        for _ in range(n):
+            with t.span('step'):
+                pass
+
+
+def nested(n):
+    with timing() as t:
+        with t.span('outer'):
+            for _ in range(n):
+                with t.span('step'):
+                    pass
+
+
+def span_traced(n):
+    with timing(tracer=Tracer()) as t:
+        for _ in range(n):
+            with t.span('step'):
+                pass
+
+
+def call(n):
+    def f():
+        pass
+    for _ in range(n):
+        f()
+
+
+def call_traced(n):
+    f = traced(tracer=Tracer())(lambda: None)
+    for _ in range(n):
+        f()
+
+
+def main(n=10**6):
+    bench('loop', empty, n)
+    bench('2x perf_counter_ns', clock, n)
+    bench('empty context manager', context, n)
+    bench('histogram add', histogram, n)
+    bench('span', flat, n)
+    bench('nested span', nested, n)
+    bench('traced span', span_traced, n)
+    bench('call', call, n)
+    bench('traced call', call_traced, n)
+
+
+if __name__ == '__main__':
+    main()
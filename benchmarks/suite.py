@@ -0,0 +1,267 @@
+"""
+benchmark suite of the pyadds hot paths with regression checks
+
+    python -m benchmarks.suite [--save] [--threshold 0.25] [--filter name]
+
+Each benchmark is timed as best per-call time of several repeats.  With
+`--save` the results are stored as baseline, otherwise they are compared
+against the stored baseline and the run fails when a benchmark got slower
+than the threshold allows or raises although it has a baseline.  Other
+benchmarks that can not run in the current environment are reported as
+skipped.
+"""
+from itertools import product
+import argparse
+import asyncio
+import timeit
+import json
+import sys
+import os
+
+baseline_path = os.path.join(os.path.dirname(__file__), 'baseline.json')
+
+benchmarks = []
+
+
+def benchmark(name, number=None, **params):
+    """
+    register a benchmark, the decorated setup function returns the
+    callable to time, parameters are given as lists of values to run with
+    """
+    def register(setup):
+        keys = sorted(params)
+        for values in product(*(params[key] for key in keys)):
+            kws = dict(zip(keys, values))
+            full = name
+            if kws:
+                full += '[{}]'.format(','.join(
+                    '{}={}'.format(k, v) for k, v in kws.items()))
+            benchmarks.append((full, setup, kws, number))
+        return setup
+    return register
+
+
+def run(setup, kws, number=None, repeat=5):
+    """ best time per call in ns """
+    call = setup(**kws)
+    timer = timeit.Timer(call)
+    if number is None:
+        number, _ = timer.autorange()
+    return min(timer.repeat(repeat, number)) / number * 1e9
+
+
+# descriptors
+
+def descriptors():
+    from pyadds.annotate import attr, delayed, refers, once
+
+    class Obj:
+        @attr
+        def attr_(self):
+            return 1
+
+        @delayed
+        def delayed_(self):
+            return 1
+
+        @refers
+        def refers_(self):
+            return 1
+
+        @once
+        def once_(self):
+            return 1
+    return Obj
+
+
+@benchmark('descriptor.get', kind=['attr', 'delayed', 'refers', 'once'])
+def descriptor_get(kind):
+    obj = descriptors()()
+    name = kind + '_'
+    getattr(obj, name)
+    return lambda: getattr(obj, name)
+
+
+@benchmark('descriptor.set', kind=['attr', 'delayed', 'refers'])
+def descriptor_set(kind):
+    obj = descriptors()()
+    name = kind + '_'
+    return lambda: setattr(obj, name, 1)
+
+
+@benchmark('descriptor.set_once')
+def descriptor_set_once():
+    Obj = descriptors()
+    return lambda: setattr(Obj(), 'once_', 1)
+
+
+@benchmark('get.iter')
+def get_iter():
+    from pyadds.annotate import Get
+    obj = descriptors()()
+    return lambda: list(Get.iter(obj, bind=True))
+
+
+@benchmark('initialize')
+def initialize():
+    from pyadds.annotate import initialized, initialize
+
+    class Obj:
+        @initialized
+        def value(self, **opts):
+            return 1
+            yield
+
+    loop = asyncio.new_event_loop()
+    return lambda: loop.run_until_complete(initialize(Obj()))
+
+
+# observe
+
+@benchmark('observe.emit', observers=[0, 1, 10, 100])
+def observe_emit(observers):
+    from pyadds.observe import Observable, emitting
+
+    class Model(Observable):
+        @emitting
+        def change(self, value):
+            return value
+
+    class Observer:
+        def notify(self, event):
+            pass
+
+    model = Model()
+    for _ in range(observers):
+        model.subscribe(Observer())
+    return lambda: model.change(42)
+
+
+# cooperative types
+
+@benchmark('co.compose', cache=['hit', 'miss'])
+def co_compose(cache):
+    from pyadds.cooptypes import Co
+
+    class FooBase:
+        pass
+
+    class FooImpl(FooBase):
+        pass
+
+    class BarImpl(FooBase):
+        pass
+
+    if cache == 'hit':
+        typ = Co[FooImpl, BarImpl]
+        return lambda: Co[FooImpl, BarImpl]
+    return lambda: Co.__cache__.clear() or Co[FooImpl, BarImpl]
+
+
+# operators
+
+@benchmark('ops.forward', op=['add', 'lt', 'radd', 'neg'])
+def ops_forward(op):
+    from pyadds.meta.ops import operate
+
+    class Meter(operate('value')(float)):
+        def __init__(self, value):
+            self.value = value
+
+    a, b = Meter(1.), Meter(2.)
+    return {'add': lambda: a + 1., 'lt': lambda: a < b,
+            'radd': lambda: 1. + a, 'neg': lambda: -a}[op]
+
+
+@benchmark('ops.mixin')
+def ops_mixin():
+    from pyadds.meta.ops import autowraped_ops
+    return lambda: autowraped_ops(int, by='value')
+
+
+# str
+
+@benchmark('str.uncamel', cache=['hit', 'miss'])
+def str_uncamel(cache):
+    from pyadds.str import uncamel
+    if cache == 'hit':
+        return lambda: uncamel('HTTPRequestHeader')
+    return lambda: uncamel.__wrapped__('HTTPRequestHeader')
+
+
+# spawn
+
+class Noop:
+    def run(self):
+        pass
+
+
+@benchmark('spawn.latency', number=3, method=['fork', 'spawn', 'forkserver'])
+def spawn_latency(method):
+    from pyadds.spawn import Spawner
+    spawner = Spawner(method=method, aggregate_logs=False)
+    noop = Noop()
+
+    def spawn():
+        spawner.spawn(noop.run).join()
+    return spawn
+
+
+def compare(results, baseline, threshold):
+    """ list of (name, ratio) of results slower than the threshold allows """
+    return [(name, ns / baseline[name]) for name, ns in results.items()
+            if name in baseline and ns > baseline[name] * (1 + threshold)]
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--save', action='store_true',
+                        help='store the results as new baseline')
+    parser.add_argument('--baseline', default=baseline_path)
+    parser.add_argument('--threshold', type=float, default=float(
+        os.environ.get('PYADDS_BENCH_THRESHOLD', .25)),
+        help='allowed slowdown against the baseline (default: 0.25)')
+    parser.add_argument('--filter', default='',
+                        help='only run benchmarks containing this string')
+    opts = parser.parse_args(args)
+
+    baseline = {}
+    if os.path.exists(opts.baseline):
+        with open(opts.baseline) as f:
+            baseline = json.load(f)
+
+    results = {}
+    failed = []
+    for name, setup, kws, number in benchmarks:
+        if opts.filter not in name:
+            continue
+        try:
+            ns = results[name] = run(setup, kws, number)
+        except Exception as e:
+            if name in baseline:
+                failed.append(name)
+            print('{:<40} {:>12}  ({}: {})'.format(
+                name, 'failed' if name in baseline else 'skipped',
+                type(e).__name__, e))
+            continue
+        base = baseline.get(name)
+        change = '{:+.0%}'.format(ns / base - 1) if base else ''
+        print('{:<40} {:>12.0f}ns {:>6}'.format(name, ns, change))
+
+    if opts.save:
+        baseline.update(results)
+        with open(opts.baseline, 'w') as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+        print('saved baseline to {}'.format(opts.baseline))
+        return 0
+
+    slower = compare(results, baseline, opts.threshold)
+    for name, ratio in slower:
+        print('regression: {} is {:.2f}x the baseline'.format(name, ratio))
+    for name in failed:
+        print('regression: {} failed, but has a baseline'.format(name))
+    return 1 if slower or failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
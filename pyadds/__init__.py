@@ -1,17 +1,39 @@
-class AnythingType(set):
-    def __contains__(self, other):
-        return True
+from .sets import AnythingType, Anything
 
-    def intersection(self, other):
-        return other
 
-    def union(self, other):
-        return self
+# public api of the submodules, only imported on first access,
+# so `import pyadds` stays cheap for short lived processes
+__lazy__ = {
+    'Modular': 'cooptypes', 'Co': 'cooptypes',
+    'attr': 'annotate', 'delayed': 'annotate', 'refers': 'annotate',
+    'cached': 'annotate', 'once': 'annotate', 'initialized': 'annotate',
+    'initialize': 'annotate',
+    'Observable': 'observe', 'emitting': 'observe', 'observes': 'observe',
+    'log': 'logging', 'lazy': 'logging', 'fields': 'logging',
+    'Spawner': 'spawn', 'get_spawner': 'spawn',
+    'Monitor': 'monitor',
+    'Timing': 'timing', 'traced': 'timing', 'tracing': 'timing',
+    'uncamel': 'str', 'splitcamel': 'str', 'name_of': 'str', 'abbrev': 'str',
+    'maybug': 'forkbug', 'cowrapbug': 'forkbug',
+    'operate': 'meta.ops', 'Batch': 'meta.ops',
+    'Complement': 'sets', 'Symbols': 'sets', 'BitSet': 'sets',
+    'SharedCache': 'shared',
+}
 
-    def __str__(self):
-        return '*'
+__all__ = ['AnythingType', 'Anything'] + sorted(__lazy__)
 
-    def __repr__(self):
-        return "Anything"
 
-Anything = AnythingType()
+def __getattr__(name):
+    try:
+        module = __lazy__[name]
+    except KeyError:
+        raise AttributeError('module {!r} has no attribute {!r}'
+                             .format(__name__, name)) from None
+    from importlib import import_module
+    value = getattr(import_module('.' + module, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__lazy__))
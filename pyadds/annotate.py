@@ -1,7 +1,7 @@
 from functools import wraps
 import weakref
-
-from asyncio import coroutine, gather
+import types
+import os
 
 
 class Named:
@@ -24,10 +24,24 @@ class Annotate(Named):
 class Conotate(Annotate):
     """ annotation that is defined as a coroutine """
     def __init__(self, definition, *args, **kws):
-        definition = coroutine(definition)
+        import inspect
+        if (inspect.isgeneratorfunction(definition)
+                or inspect.iscoroutinefunction(definition)):
+            definition = types.coroutine(definition)
+        else:
+            definition = types.coroutine(_returning(definition))
         super().__init__(definition, *args, **kws)
 
 
+def _returning(f):
+    """ generator function returning the result of a plain function """
+    @wraps(f)
+    def returning(*args, **kws):
+        return f(*args, **kws)
+        yield
+    return returning
+
+
 class Descr(Named):
     """ base for building descriptors """
     def lookup(self, obj):
@@ -62,6 +76,27 @@ class RefDescr(Descr):
         return self.refs, obj
 
 
+class SharedDescr(Descr):
+    """
+    descriptor mixin putting values in the shared memory cache of the process,
+    keyed by the `__shared_key__` of the object or a random token kept in the
+    objects dict, so copies pickled to other processes share the values
+    """
+
+    def key(self, obj):
+        """ key of the object, creating its token when needed """
+        key = getattr(obj, '__shared_key__', None)
+        if key is None:
+            key = obj.__dict__.get('_shared_key')
+        if key is None:
+            key = obj.__dict__.setdefault('_shared_key', os.urandom(8).hex())
+        return key
+
+    def lookup(self, obj):
+        from .shared import current
+        return current(), '{}.{}'.format(self.key(obj), self.name)
+
+
 class Get(Descr):
     """ get descriptor calling using provided lookup and falling back to __default__ """
     def __get__(self, obj, objtype=None):
@@ -156,6 +191,27 @@ class refers(Defaults, RefDescr, Cache):
 cached = refers
 
 
+class shared(Defaults, SharedDescr, Get):
+    """
+    evaluate once for all processes of a spawner and keep the value read-only,
+    see `pyadds.shared`
+    """
+    def __get__(self, obj, objtype=None):
+        if obj is None:
+            return self
+
+        cache, key = self.lookup(obj)
+        return cache.compute(key, lambda: self.__default__(obj))
+
+    def __set__(self, obj, value):
+        raise AttributeError("Shared attribute {} of {} can not be set"
+                             .format(self.name, type(obj).__name__))
+
+    def __delete__(self, obj):
+        raise AttributeError("Shared attribute {} of {} can not be deleted"
+                             .format(self.name, type(obj).__name__))
+
+
 class once(Defaults, RefDescr, Cache):
     def __set__(self, obj, value):
         if obj:
@@ -177,13 +233,14 @@ class initialized(Conotate, RefDescr, Cache):
     pass
 
 
-@coroutine
+@types.coroutine
 def initialize(obj, **opts):
     """ call all `@initialized` descriptors to initialize values """
+    from asyncio import gather
     calls = []
     for desc in initialized.iter(obj):
         if desc.has_entry(obj):
-            @coroutine
+            @types.coroutine
             def init():
                 val = yield from desc.definition(obj, **opts)
                 desc.__set__(obj, val)
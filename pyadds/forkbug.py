@@ -1,13 +1,30 @@
 from contextlib import contextmanager
-import asyncio
-
-from .logging import logging
+from collections import deque
+from itertools import count
+import traceback
+import logging
+import reprlib
+import types
+import time
+import sys
+import os
 
 
 logger = logging.getLogger(__name__)
 
 fork_debug = True
 
+# fork the debugger into a child process, so the current process continues
+isolate_debug = False
+# at most `n` debug forks during `seconds`
+debug_limit = (1, 60.)
+# directory for crash snapshots, when no debug process is forked
+snapshot_dir = '.'
+
+_debug_forks = deque()
+_debug_pids = set()
+_snapshots = count()
+
 
 def fork_debugger(namespace=None):
     logger.warning('forking with ipython kernel for debugging ...')
@@ -37,10 +54,104 @@ def fork_debugger(namespace=None):
         logger.error('failed to embed ipython: %s', e, exc_info=True)
 
 
+def crash_snapshot(exc_info=None, directory=None, limit=200):
+    """
+    write the traceback and the repr-limited locals of all frames to a file
+
+    Return
+    ------
+    path : str
+        path of the written snapshot
+    """
+    typ, exc, tb = exc_info or sys.exc_info()
+    short = reprlib.Repr()
+    short.maxstring = short.maxother = limit
+
+    lines = traceback.format_exception(typ, exc, tb)
+    for frame, lineno in traceback.walk_tb(tb):
+        lines.append('\n{} ({}:{})\n'.format(
+            frame.f_code.co_name, frame.f_code.co_filename, lineno))
+        for name, value in frame.f_locals.items():
+            try:
+                value = short.repr(value)
+            except Exception as e:
+                value = '<repr failed: {!r}>'.format(e)
+            lines.append('    {} = {}\n'.format(name, value))
+
+    path = os.path.join(directory or snapshot_dir, 'crash-{}-{}-{}.txt'.format(
+        time.strftime('%Y%m%d-%H%M%S'), os.getpid(), next(_snapshots)))
+    with open(path, 'w') as f:
+        f.writelines(lines)
+    logger.warning('wrote crash snapshot to %s', path)
+    return path
+
+
+def _snapshot():
+    try:
+        return crash_snapshot()
+    except Exception as e:
+        logger.error('failed to write crash snapshot: %s', e, exc_info=True)
+
+
+def _may_fork():
+    # reap finished debug processes
+    for pid in list(_debug_pids):
+        try:
+            done, _ = os.waitpid(pid, os.WNOHANG)
+        except ChildProcessError:
+            done = pid
+        if done:
+            _debug_pids.discard(pid)
+
+    n, seconds = debug_limit
+    now = time.monotonic()
+    while _debug_forks and _debug_forks[0] < now - seconds:
+        _debug_forks.popleft()
+    if len(_debug_forks) >= n or not hasattr(os, 'fork'):
+        return False
+    _debug_forks.append(now)
+    return True
+
+
+def fork_isolated(namespace=None):
+    """
+    fork a process holding the current exception for the debugger and
+    return its pid right away, falling back to a crash snapshot when the
+    debug forks are rate limited or forking fails
+
+    Failures are only logged, so the exception being handled is not
+    replaced.
+    """
+    if not _may_fork():
+        _snapshot()
+        return None
+
+    try:
+        pid = os.fork()
+    except Exception as e:
+        logger.error('failed to fork debug process: %s', e, exc_info=True)
+        _snapshot()
+        return None
+
+    if pid:
+        _debug_pids.add(pid)
+        logger.warning('forked debug process %s', pid)
+        return pid
+
+    try:
+        # the forked child does not run the loop of the parent
+        if 'asyncio' in sys.modules:
+            sys.modules['asyncio'].events._set_running_loop(None)
+        fork_debugger(namespace=namespace)
+    finally:
+        os._exit(0)
+
+
 @contextmanager
-def maybug(info=None, namespace=None):
+def maybug(info=None, namespace=None, isolate=None):
     """
-    forks a debugger when an execption is thrown
+    forks a debugger when an execption is thrown,
+    with `isolate` (or `isolate_debug`) inside a separate process
     """
     try:
         yield
@@ -49,11 +160,14 @@ def maybug(info=None, namespace=None):
     except Exception:
         logger.error('exception occured inside %s', info or 'maybug context', exc_info=True)
         if fork_debug:
-            fork_debugger(namespace=namespace)
+            if isolate_debug if isolate is None else isolate:
+                fork_isolated(namespace=namespace)
+            else:
+                fork_debugger(namespace=namespace)
         raise
 
 
-@asyncio.coroutine
-def cowrapbug(coro, info=None, namespace=None):
-    with maybug(info=info, namespace=namespace):
+@types.coroutine
+def cowrapbug(coro, info=None, namespace=None, isolate=None):
+    with maybug(info=info, namespace=namespace, isolate=isolate):
         yield from coro
@@ -0,0 +1,203 @@
+"""
+compact append-only journal of `Observable` events for auditing and replay
+"""
+from collections import namedtuple
+import threading
+import weakref
+import atexit
+import pickle
+import struct
+import mmap
+import os
+
+from .observe import Event
+from .logging import log
+
+# kind, name id, payload size
+header = struct.Struct('<BHI')
+NAME, EVENT = b'NE'
+max_names = 1 << 16
+
+_open = weakref.WeakSet()
+
+
+@atexit.register
+def _close_all():
+    for journal in list(_open):
+        journal.close()
+
+
+def storable(value):
+    """ the value when it can be pickled, its repr otherwise """
+    try:
+        pickle.dumps(value)
+        return value
+    except Exception:
+        return repr(value)
+
+
+class Entry(namedtuple('Entry', 'name args kws result')):
+    """ event read back from a journal """
+
+
+@log
+class Journal:
+    """
+    append-only binary log of events split into size limited segments
+
+    Event names are interned per segment, arguments and results are pickled
+    once when recording, unpicklable values are stored by their repr.  When
+    a segment exceeds `max_segment` bytes or its names a new one is started
+    and only the latest `max_segments` segments are kept.
+
+    Recording is thread safe and events that can not be recorded are logged
+    and counted in `failed`, as the emitting method already ran.  Open
+    journals are closed at exit, or when leaving them as context manager.
+
+    >>> with Journal('/var/log/model') as model.journal:
+    ...     model.foo(42)
+    ... model.journal.replay(other_model)
+    """
+    def __init__(self, path, prefix='events', max_segment=64 << 20,
+                 max_segments=16):
+        self.path = path
+        self.prefix = prefix
+        self.max_segment = max_segment
+        self.max_segments = max_segments
+        self.file = None
+        self.names = {}
+        self.failed = 0
+        self.lock = threading.RLock()
+        os.makedirs(path, exist_ok=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def segments(self):
+        """ paths of the segments, oldest first """
+        return sorted(os.path.join(self.path, name)
+                      for name in os.listdir(self.path)
+                      if name.startswith(self.prefix + '-')
+                      and name.endswith('.log'))
+
+    def rotate(self):
+        """ start a new segment, dropping the oldest ones """
+        with self.lock:
+            self.close()
+            segments = self.segments()
+            number = 0
+            if segments:
+                number = int(segments[-1].rsplit('-', 1)[1][:-4]) + 1
+            for old in segments[:max(0, len(segments) + 1
+                                     - self.max_segments)]:
+                os.remove(old)
+            self.file = open(os.path.join(self.path, '{}-{:08d}.log'.format(
+                self.prefix, number)), 'ab')
+            self.names = {}
+            _open.add(self)
+
+    def _name(self, name):
+        try:
+            return self.names[name]
+        except KeyError:
+            ident = self.names[name] = len(self.names)
+            encoded = name.encode()
+            self.file.write(header.pack(NAME, ident, len(encoded)) + encoded)
+            return ident
+
+    def record(self, event):
+        """ append an event, logging failures instead of raising them """
+        try:
+            self._record(event)
+        except Exception:
+            self.failed += 1
+            self.__log.exception('failed to record %s event',
+                                 getattr(event, '__name__', event))
+
+    def _record(self, event):
+        values = (event.args, event.kws, event.result)
+        try:
+            payload = pickle.dumps(values, pickle.HIGHEST_PROTOCOL)
+        except Exception:
+            values = (tuple(map(storable, event.args)),
+                      {key: storable(value)
+                       for key, value in event.kws.items()},
+                      storable(event.result))
+            payload = pickle.dumps(values, pickle.HIGHEST_PROTOCOL)
+
+        name = event.__name__
+        with self.lock:
+            if (self.file is None or self.file.tell() > self.max_segment
+                    or name not in self.names
+                    and len(self.names) >= max_names):
+                self.rotate()
+            ident = self._name(name)
+            self.file.write(header.pack(EVENT, ident, len(payload)) + payload)
+
+    def flush(self):
+        with self.lock:
+            if self.file is not None:
+                self.file.flush()
+
+    def close(self):
+        with self.lock:
+            if self.file is not None:
+                self.file.close()
+                self.file = None
+                _open.discard(self)
+
+    def read(self, segment):
+        """ iterate over the entries of a segment using a memory map """
+        with open(segment, 'rb') as f:
+            if not os.fstat(f.fileno()).st_size:
+                return
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                names = {}
+                pos, end = 0, len(data)
+                while pos + header.size <= end:
+                    kind, ident, size = header.unpack_from(data, pos)
+                    pos += header.size
+                    if pos + size > end:
+                        # incomplete write at the end of the segment
+                        break
+                    if kind == NAME:
+                        names[ident] = data[pos:pos+size].decode()
+                    else:
+                        yield Entry(names[ident],
+                                    *pickle.loads(data[pos:pos+size]))
+                    pos += size
+
+    def __iter__(self):
+        self.flush()
+        for segment in self.segments():
+            yield from self.read(segment)
+
+    def replay(self, model, names=None):
+        """
+        feed the recorded events to the observers of a model,
+        without recording them again
+
+        Return
+        ------
+        n : int
+            number of replayed events
+        """
+        emitters = {}
+        n = 0
+        for name, args, kws, result in self:
+            if names is not None and name not in names:
+                continue
+            try:
+                f, spec = emitters[name]
+            except KeyError:
+                emit = getattr(type(model), name)
+                f, spec = emitters[name] = emit.__wrapped__, emit.__argspec__
+
+            event = Event(f, spec, result, model, args, kws)
+            for obs in model.observers:
+                obs.notify(event)
+            n += 1
+        return n
@@ -1,28 +1,370 @@
+import threading
 import logging
+import atexit
+import pickle
+import copy
+import queue
 
 
-class lazy(tuple):
+class lazy:
     """
+    log argument evaluated once when the record is rendered
+
     >>> logger.debug('%s', lazy(lambda: 'complex stuff')
     complex stuff
     """
-    def __new__(cls, lam):
-        return super().__new__(cls, (lam,))
+    __slots__ = ('lam', 'value')
+
+    def __init__(self, lam):
+        self.lam = lam
+
+    def __call__(self):
+        try:
+            return self.value
+        except AttributeError:
+            self.value = self.lam()
+            return self.value
 
     def __str__(self):
-        lam, = self
-        return str(lam())
+        return str(self())
 
     def __repr__(self):
-        lam, = self
-        return repr(lam())
+        return repr(self())
+
+
+class fields(dict):
+    """
+    lazy structured fields to pass as `extra` of a logging call
+
+    Each field becomes an attribute of the `LogRecord` holding a `lazy`
+    value, so formatters can use them like '%(message)s (%(size)s)'.  The
+    names of the fields are kept in `record.fields`, so handlers can get the
+    values with `record_fields` without any string formatting.
+
+    >>> logger.info('processed items', extra=fields(size=lambda: len(items)))
+    """
+    def __init__(self, **lams):
+        super().__init__(lams, fields=None)
+
+    def __getitem__(self, name):
+        # only called when a record is created, so wrap values here
+        if name == 'fields':
+            return tuple(key for key in self if key != 'fields')
+        return lazy(super().__getitem__(name))
+
+
+def record_fields(record):
+    """
+    get the evaluated structured fields of a log record, values may already
+    be evaluated, e.g. for records sent by a `PipeHandler`
+    """
+    values = {}
+    for name in getattr(record, 'fields', None) or ():
+        value = getattr(record, name)
+        values[name] = value() if isinstance(value, lazy) else value
+    return values
+
+
+class BoundedQueueHandler(logging.Handler):
+    """
+    queue handler for a bounded queue with a policy for a full queue
+
+    When a `listener` is given, it is started with the first record put into
+    the queue.
+
+    Parameters
+    ----------
+    queue : queue.Queue
+        bounded queue the records are put into
+    overflow : str
+        'drop' records when the queue is full, 'block' until there is space
+        or 'sample' every n-th overflowing record by blocking for it
+    sample : int
+        sampling rate used for the 'sample' overflow policy
+    listener : logging.handlers.QueueListener
+        listener handling the records of the queue
+    """
+    policies = ('drop', 'block', 'sample')
+
+    def __init__(self, queue, overflow='drop', sample=100, listener=None):
+        if overflow not in self.policies:
+            raise ValueError('overflow policy should be one of {}'.format(
+                ', '.join(self.policies)))
+        super().__init__()
+        self.queue = queue
+        self.overflow = overflow
+        self.sample = sample
+        self.dropped = 0
+        self.listener = listener
+        self.listening = False
+
+    def listen(self):
+        """ start the listener, if it is not running yet """
+        with self.lock:
+            if self.listener is not None and not self.listening:
+                self.listening = True
+                self.listener.start()
+
+    def unlisten(self):
+        """ stop the listener after it handled the queued records """
+        with self.lock:
+            listening, self.listening = self.listening, False
+        if listening:
+            # `QueueListener.stop` does not wait for space in a full queue
+            listener = self.listener
+            self.queue.put(listener._sentinel)
+            listener._thread.join()
+            listener._thread = None
+
+    def emit(self, record):
+        try:
+            if not self.listening:
+                self.listen()
+            self.enqueue(self.prepare(record))
+        except Exception:
+            self.handleError(record)
+
+    def prepare(self, record):
+        # render the message now, as mutable arguments may change before
+        # the listener thread handles the record
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record):
+        if self.overflow == 'block':
+            self.queue.put(record)
+            return
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+            if self.overflow == 'sample' and self.dropped % self.sample == 0:
+                self.queue.put(record)
+
+
+class RootHandlers(logging.Handler):
+    """
+    handler passing records on to the current handlers of the loggers above
+    the queued logger, as if the record propagated
+    """
+    def handle(self, record):
+        logger = logging.getLogger(record.name)
+        while (logger.parent is not None
+               and logger.name not in __queued_loggers__):
+            logger = logger.parent
+        (logger.parent or logger).callHandlers(record)
+
+
+__queued__ = None
+__queued_loggers__ = set()
+
+
+def queue_logging(*handlers, maxsize=10000, overflow='drop', sample=100,
+                  start=True):
+    """
+    setup the background listener used by `log(queued=True)`
+
+    Parameters
+    ----------
+    handlers : logging.Handler
+        handlers the listener thread passes the records to,
+        defaults to the handlers of the root logger at the time of handling
+    maxsize : int
+        bound of the record queue
+    overflow : str
+        policy for a full queue, see `BoundedQueueHandler`
+    start : bool
+        start the listener thread now instead of with the first record
+
+    Return
+    ------
+    handler : BoundedQueueHandler
+        the handler putting records into the queue
+    """
+    from logging.handlers import QueueListener
+    global __queued__
+    stop_queue_logging()
+
+    records = queue.Queue(maxsize)
+    listener = QueueListener(records, *(handlers or (RootHandlers(),)),
+                             respect_handler_level=True)
+    handler = BoundedQueueHandler(records, overflow=overflow, sample=sample,
+                                  listener=listener)
+    if start:
+        handler.listen()
+    __queued__ = handler
+
+    for name in __queued_loggers__:
+        _enqueue(logging.getLogger(name), handler)
+    return handler
+
+
+def _enqueue(logger, handler):
+    logger.addHandler(handler)
+    logger.propagate = False
+
+
+def stop_queue_logging():
+    """
+    stop the listener thread after handling the queued records,
+    queued loggers fall back to synchronous logging afterwards
+    """
+    global __queued__
+    if __queued__ is not None:
+        handler = __queued__
+        __queued__ = None
+        for name in __queued_loggers__:
+            logger = logging.getLogger(name)
+            logger.removeHandler(handler)
+            logger.propagate = True
+        handler.unlisten()
+
+
+atexit.register(stop_queue_logging)
+
+
+_record_attrs = frozenset(logging.makeLogRecord({}).__dict__)
+
+
+class PipeHandler(logging.Handler):
+    """
+    handler sending batches of records through a pipe to another process
+
+    Records are collected and sent as a list when `batch` records are
+    pending, when a record of at least `urgent` level is handled or by a
+    background thread every `interval` seconds.  Extra record attributes
+    that can not be pickled are sent as their `repr`.
+
+    Parameters
+    ----------
+    pipe : multiprocessing.SimpleQueue
+        pipe shared with the `PipeListener` of the other process
+    """
+    def __init__(self, pipe, batch=64, interval=.5, urgent=logging.ERROR):
+        super().__init__()
+        self.pipe = pipe
+        self.batch = batch
+        self.interval = interval
+        self.urgent = urgent
+        self.pending = []
+        self.timer = None
+        self.closed = threading.Event()
 
+    def prepare(self, record):
+        """ get a picklable dict of the record """
+        dct = dict(record.__dict__)
+        for name in dct.get('fields') or ():
+            dct[name] = dct[name]()
+        for name in dct.keys() - _record_attrs:
+            try:
+                pickle.dumps(dct[name])
+            except Exception:
+                dct[name] = repr(dct[name])
+        dct['msg'] = record.getMessage()
+        dct['args'] = None
+        if record.exc_info:
+            formatter = self.formatter or logging.Formatter()
+            dct['exc_text'] = formatter.formatException(record.exc_info)
+            dct['exc_info'] = None
+        return dct
+
+    def emit(self, record):
+        try:
+            self.pending.append(self.prepare(record))
+            if self.timer is None:
+                self.timer = threading.Thread(target=self.tick, daemon=True,
+                                              name='log-pipe-flush')
+                self.timer.start()
+            if (len(self.pending) >= self.batch
+                    or record.levelno >= self.urgent):
+                self.flush()
+        except Exception:
+            self.handleError(record)
+
+    def tick(self):
+        while not self.closed.wait(self.interval):
+            self.flush()
+
+    def flush(self):
+        with self.lock:
+            pending, self.pending = self.pending, []
+            if pending:
+                try:
+                    self.pipe.put(pending)
+                except Exception:
+                    self.handleError(logging.makeLogRecord(pending[0]))
+
+    def close(self):
+        self.closed.set()
+        self.flush()
+        super().close()
+
+
+class PipeListener:
+    """
+    thread receiving batches of records from `PipeHandler`s of other
+    processes, handling them with the loggers of this process
+    """
+    def __init__(self, pipe):
+        self.pipe = pipe
+        self.thread = None
+
+    def start(self):
+        self.thread = threading.Thread(target=self.listen, daemon=True,
+                                       name='log-listener')
+        self.thread.start()
+
+    def listen(self):
+        while True:
+            batch = self.pipe.get()
+            if batch is None:
+                break
+            for dct in batch:
+                record = logging.makeLogRecord(dct)
+                logger = logging.getLogger(record.name)
+                if logger.isEnabledFor(record.levelno):
+                    logger.handle(record)
+
+    def stop(self):
+        """ stop the thread after handling the already send records """
+        if self.thread is not None:
+            self.pipe.put(None)
+            self.thread.join()
+            self.thread = None
+
+
+def log(cls=None, *, queued=False):
+    """
+    class decorator adding a logger as `cls.logger` and private `__log`
+
+    With `queued` records are put into a bounded queue and handled by a
+    background listener thread (see `queue_logging`), so the handlers i/o
+    is not done in the calling thread.  The thread is started with the first
+    queued record.  Disabled levels are checked against
+    the per logger cache of `Logger.isEnabledFor` before any record is
+    created.
+
+    >>> @log(queued=True)
+    ... class Worker:
+    ...     def work(self):
+    ...         self.__log.info('working')
+    """
+    if cls is None:
+        return lambda cls: log(cls, queued=queued)
 
-def log(cls):
     name = '.'.join((cls.__module__, cls.__name__))
     attr = '_%s__log' % cls.__qualname__
 
     logger = logging.getLogger(name)
+    if queued:
+        handler = (__queued__ if __queued__ is not None
+                   else queue_logging(start=False))
+        if name not in __queued_loggers__:
+            __queued_loggers__.add(name)
+            _enqueue(logger, handler)
+
     setattr(cls, attr, logger)
     setattr(cls, 'logger', logger)
     return cls
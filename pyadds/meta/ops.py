@@ -1,8 +1,14 @@
+from contextlib import contextmanager
 from functools import wraps
-from collections import namedtuple
+from collections import namedtuple, Counter
+from itertools import chain
+from numbers import Integral
 
 import operator
 import builtins
+import weakref
+import time
+import sys
 
 
 def get_op(name):
@@ -136,20 +142,78 @@ operators = _Operators(
 )
 
 
-def iter_ops(cls, reflect=True):
+def iter_ops(cls, reflect=True, table=operators, native=True):
     """
     iterator over all operators of a class
+
+    Reflected operators are included when `reflect` is set and the class
+    defines the operator, or when `native` is set and the class defines the
+    reflected operator itself.
     """
-    for op in operators:
+    for op in table:
         if hasattr(cls, op.defines):
             yield op
         if op.reflect:
             ref = op.reflect
             if (reflect and hasattr(cls, op.defines)
-                    or hasattr(cls, ref.defines)):
+                    or native and hasattr(cls, ref.defines)):
                 yield ref
 
 
+_capabilities = weakref.WeakKeyDictionary()
+
+
+def _fingerprint(cls):
+    # cheap enough for every lookup: catches changed bases and attributes
+    # added to or removed from them, but not replaced ones
+    return tuple((id(base), len(vars(base))) for base in cls.__mro__)
+
+
+def _cached(cls, key, compute):
+    caps = _capabilities.get(cls)
+    if caps is None:
+        caps = _capabilities[cls] = {}
+
+    fingerprint = _fingerprint(cls)
+    try:
+        known, value = caps[key]
+        if known == fingerprint:
+            return value
+    except KeyError:
+        pass
+
+    value = compute()
+    caps[key] = (fingerprint, value)
+    return value
+
+
+def capabilities(cls, reflect=True, table=operators, native=True):
+    """
+    operators of a table that are supported by a class
+
+    The operators are discovered once per class and cached, the cache entry
+    is invalidated when the mro of the class changes or attributes get added
+    to or removed from its bases.  Call `invalidate` after replacing methods
+    in place, e.g. deleting one operator and adding another.
+
+    Return
+    ------
+    ops : tuple
+        tuple of supported `Op`s
+    """
+    return _cached(cls, (table.name, reflect, native),
+                   lambda: tuple(iter_ops(cls, reflect=reflect, table=table,
+                                          native=native)))
+
+
+def invalidate(cls=None):
+    """ drop cached operator capabilities of a class or of all classes """
+    if cls is None:
+        _capabilities.clear()
+    else:
+        _capabilities.pop(cls, None)
+
+
 def opsame(op):
     """ checks for type mismatch between first and second argument"""
     @wraps(op)
@@ -172,7 +236,32 @@ def operate(by=None, reflect=True):
         return annotate
 
 
-def autowraped_ops(cls, by=None, reflect=True):
+def forwarding(cls, op, by=None):
+    """
+    method forwarding an operator to wrapped instances
+
+    Parameters
+    ----------
+    cls : type
+        class of the wrapped instances
+    op : Op
+        operator to forward
+    by : str
+        instance attribute holding the wrapped object, when not set the
+        wrapped object is constructed by calling `cls` on the instance
+    """
+    call = op.__call__
+    if by:
+        def wrap(self, *args):
+            return call(getattr(self, by), *args)
+    else:
+        def wrap(self, *args):
+            return call(cls(self), *args)
+    return wraps(getattr(cls, op.method))(wrap)
+
+
+def autowraped_ops(cls, by=None, reflect=True, table=operators,
+                   exclude=('hash', 'eq'), native=True):
     """
     Creates a dynamic mixin with operator forwarding to wraped instances
 
@@ -184,27 +273,278 @@ def autowraped_ops(cls, by=None, reflect=True):
         instance attribute that is used to constructed wrapped objects
     reflect : bool
         also create reflected operator wrappings
+    table : _Operators
+        operators that are considered for forwarding
+    exclude : iterable
+        names of operators that are not forwarded
+    native : bool
+        forward reflected operators the class defines itself
 
     Return
     ------
     mixin : type
         dynamic mixin class with operator definitions
     """
-    def wrapping(op):
-        call = op.__call__
-        if by:
-            def wrap(self, *args):
-                return call(getattr(self, by), *args)
-        else:
-            def wrap(self, *args):
-                return call(cls(self), *args)
-        return wraps(getattr(cls, op.method))(wrap)
-
-    ops = {op.defines: wrapping(op)
-           for op in iter_ops(cls, reflect=reflect)
-           if op.name not in ['hash', 'eq']}
-    ops.update({'__def__': cls})
-    return type('Fwd' + cls.__name__, (object,), ops)
+    # only the discovery is cached, the forwarding methods refer to `cls`
+    # and would keep it alive as value of the weak cache
+    plain = {op.defines: forwarding(cls, op, by=by)
+             for op in capabilities(cls, reflect=reflect, table=table,
+                                    native=native)
+             if op.name not in exclude}
+    ops = dict(plain)
+    ops.update({'__def__': cls, '__by__': by, '__plain__': plain})
+    mixin = type('Fwd' + cls.__name__, (object,), ops)
+
+    _mixins.add(mixin)
+    if _profile is not None:
+        _profile.instrument(mixin)
+    return mixin
+
+
+_mixins = weakref.WeakSet()
+_profile = None
+
+
+class OpProfile:
+    """
+    call counts and accumulated time of forwarded operators
+    per (class, operator), optionally also tracking the call sites
+    """
+    def __init__(self, sites=False):
+        self.sites = sites
+        self.calls = Counter()
+        self.times = Counter()
+        self.callers = Counter()
+
+    def instrument(self, mixin):
+        """ replace the forwarding operators of a mixin by profiled ones """
+        for name, f in mixin.__plain__.items():
+            setattr(mixin, name, self.profiled(name, f))
+
+    def profiled(self, name, f):
+        calls = self.calls
+        times = self.times
+        callers = self.callers if self.sites else None
+        clock = time.perf_counter_ns
+
+        @wraps(f)
+        def profiled(obj, *args):
+            start = clock()
+            try:
+                return f(obj, *args)
+            finally:
+                key = (type(obj), name)
+                times[key] += clock() - start
+                calls[key] += 1
+                if callers is not None:
+                    code = sys._getframe(1)
+                    callers[key + ('{}:{}'.format(code.f_code.co_filename,
+                                                  code.f_lineno),)] += 1
+        return profiled
+
+    def hottest(self, n=None):
+        """ list of (cls, op, calls, ns) ordered by accumulated time """
+        hot = sorted(self.times.items(), key=lambda e: e[1], reverse=True)
+        return [(cls, op, self.calls[cls, op], ns)
+                for (cls, op), ns in hot[:n]]
+
+    def call_sites(self, n=None):
+        """ list of (cls, op, site, calls) ordered by call count """
+        return [key + (calls,) for key, calls in self.callers.most_common(n)]
+
+    def report(self, n=10):
+        """ textual report of the hottest operators and call sites """
+        lines = ['{:>10} {:>12} {:>9}  operator'.format('calls', 'total[ns]',
+                                                        'per[ns]')]
+        for cls, op, calls, ns in self.hottest(n):
+            lines.append('{:>10} {:>12} {:>9.0f}  {}.{}'.format(
+                calls, ns, ns / calls, cls.__qualname__, op))
+        if self.callers:
+            lines.append('{:>10} call site'.format('calls'))
+            for cls, op, site, calls in self.call_sites(n):
+                lines.append('{:>10} {} ({}.{})'.format(
+                    calls, site, cls.__qualname__, op))
+        return '\n'.join(lines)
+
+    def __str__(self):
+        return self.report()
+
+
+def profile_ops(sites=False):
+    """
+    start profiling of forwarded operators of all operate-wrapped classes,
+    returning the `OpProfile` collecting the calls
+    """
+    global _profile
+    if _profile is not None:
+        raise ValueError('operator profiling is already active')
+    _profile = OpProfile(sites=sites)
+    for mixin in list(_mixins):
+        _profile.instrument(mixin)
+    return _profile
+
+
+def unprofile_ops():
+    """ stop profiling, restoring the plain forwarding operators """
+    global _profile
+    profile, _profile = _profile, None
+    for mixin in list(_mixins):
+        for name, f in mixin.__plain__.items():
+            setattr(mixin, name, f)
+    return profile
+
+
+@contextmanager
+def profiling(sites=False):
+    """
+    profile forwarded operators inside a context
+
+    >>> with profiling() as prof:
+    ...     run_the_pipeline()
+    ... print(prof.report())
+    """
+    profile = profile_ops(sites=sites)
+    try:
+        yield profile
+    finally:
+        unprofile_ops()
+
+
+def unwrapper(typ, by=None):
+    """
+    function to get the wrapped value of an instance of an operate-wrapped type
+    """
+    if by is None:
+        by = getattr(typ, '__by__', None)
+    if by:
+        return operator.attrgetter(by)
+    return getattr(typ, '__def__', None)
+
+
+def unwrap(item):
+    """ get the wrapped value of an item, keeping other values as they are """
+    if isinstance(item, Batch):
+        return item.values
+    get = unwrapper(type(item))
+    return get(item) if get else item
+
+
+class Batch:
+    """
+    columnar collection of operate-wrapped instances
+
+    The wrapped values are held inside a numpy array, so the forwarded
+    operators are applied vectorized on the whole collection.  Compare
+    operators return boolean masks that can be used to select sub-batches,
+    numeric and unary operators return batches of the results, whose items
+    are converted to objects with `make` when accessed.  The individual
+    objects are only looked up or created when accessed.
+
+    >>> class Meter(operate('value')(float)):
+    ...     def __init__(self, value):
+    ...         self.value = value
+    >>> ms = Batch.of(map(Meter, [1., 2., 3.]))
+    >>> ms > 1.5
+    array([False,  True,  True])
+    >>> ms[ms > 1.5]
+    Batch([2., 3.])
+    >>> (ms * 2)[0].value
+    2.0
+    """
+    # let numpy leave its operators with batches to the reflected ones here
+    __array_ufunc__ = None
+
+    def __init__(self, values, objs=None, index=None, make=None, dtype=None):
+        import numpy as np
+        self.values = np.asarray(values, dtype=dtype)
+        self.objs = objs
+        self.index = index
+        self.make = make
+
+    @classmethod
+    def of(cls, items, by=None, dtype=None, make=None):
+        """
+        create a batch from wrapped instances
+
+        Parameters
+        ----------
+        items : iterable
+            operate-wrapped instances
+        by : str
+            attribute holding the wrapped value, defaults to the attribute
+            the operators of the instances are forwarded to
+        dtype : numpy.dtype
+            dtype of the columnar array
+        make : callable
+            creates an object from a value of the results of operators,
+            defaults to the type of the items
+        """
+        items = list(items)
+        get = unwrapper(type(items[0]), by) if items else None
+        values = [get(item) for item in items] if get else items
+        if make is None and items:
+            make = type(items[0])
+        return cls(values, objs=items, dtype=dtype, make=make)
+
+    def __len__(self):
+        return len(self.values)
+
+    def obj(self, i):
+        """ get the individual object at position i """
+        if self.objs is None:
+            val = self.values[i]
+            if self.make is None:
+                return val
+            # pass plain python values instead of numpy scalars
+            return self.make(val.item() if hasattr(val, 'item') else val)
+        if self.index is not None:
+            i = self.index[i]
+        return self.objs[i]
+
+    def __iter__(self):
+        return map(self.obj, range(len(self)))
+
+    def __getitem__(self, key):
+        if isinstance(key, Batch):
+            key = key.values
+        if isinstance(key, Integral):
+            return self.obj(key)
+
+        index = None
+        if self.objs is not None:
+            import numpy as np
+            index = (self.index if self.index is not None
+                     else np.arange(len(self)))[key]
+        return type(self)(self.values[key],
+                          objs=self.objs, index=index, make=self.make)
+
+    def __repr__(self):
+        import numpy as np
+        return '{}({})'.format(type(self).__name__,
+                               np.array2string(self.values, separator=', '))
+
+
+def _batch_op(op):
+    call = op.__call__
+    compare = op.kind == 'compare'
+
+    def batch_op(self, *args):
+        result = call(self.values, *map(unwrap, args))
+        if compare:
+            return result
+        if isinstance(result, tuple):
+            return tuple(Batch(part, make=self.make) for part in result)
+        return Batch(result, make=self.make)
+    batch_op.__name__ = op.defines
+    return batch_op
+
+
+Batch.__hash__ = None
+for _op in chain(operators.compare, operators.numeric, operators.unary):
+    setattr(Batch, _op.defines, _batch_op(_op))
+    if _op.reflect:
+        setattr(Batch, _op.reflect.defines, _batch_op(_op.reflect))
+del _op
 
 
 def bind(cls):
@@ -0,0 +1,157 @@
+from collections import namedtuple
+import threading
+import time
+import os
+
+from .observe import Observable, emitting
+from .logging import log
+
+
+class Sample(namedtuple('Sample', 'pid name time cpu cpu_rate rss fds '
+                                  'ctx_voluntary ctx_involuntary')):
+    """
+    resource usage of a process, with cpu time in seconds, `cpu_rate` as
+    fraction of a core since the previous sample and rss in bytes
+    """
+    @property
+    def ctx(self):
+        return self.ctx_voluntary + self.ctx_involuntary
+
+
+ticks = os.sysconf('SC_CLK_TCK')
+pagesize = os.sysconf('SC_PAGE_SIZE')
+
+
+def sample_proc(pid, name=None, last=None):
+    """
+    sample resource usage of a process from /proc/<pid>
+
+    Raises
+    ------
+    OSError
+        when the process does not exist (anymore)
+    """
+    now = time.monotonic()
+    with open('/proc/{}/stat'.format(pid)) as f:
+        # fields after the command name, which may contain spaces
+        stat = f.read().rsplit(')', 1)[1].split()
+    cpu = (int(stat[11]) + int(stat[12])) / ticks
+
+    with open('/proc/{}/statm'.format(pid)) as f:
+        rss = int(f.read().split()[1]) * pagesize
+
+    ctx = {}
+    with open('/proc/{}/status'.format(pid)) as f:
+        for line in f:
+            key, _, value = line.partition(':')
+            if key.endswith('ctxt_switches'):
+                ctx[key] = int(value)
+
+    try:
+        fds = len(os.listdir('/proc/{}/fd'.format(pid)))
+    except PermissionError:
+        fds = -1
+
+    rate = 0.
+    if last and now > last.time:
+        rate = (cpu - last.cpu) / (now - last.time)
+    return Sample(pid, name, now, cpu, rate, rss, fds,
+                  ctx.get('voluntary_ctxt_switches', 0),
+                  ctx.get('nonvoluntary_ctxt_switches', 0))
+
+
+@log
+class Monitor(Observable):
+    """
+    samples the resource usage of the children of a `Spawner`
+
+    Limits for fields of `Sample` (e.g. `rss=2**30` or `cpu_rate=.9`) are
+    checked on each sample, emitting an `exceeded` event to the subscribers
+    once per breach.  A breach ends when the value falls below the limit
+    reduced by the `hysteresis` fraction.
+    With `restart` children exceeding a limit are respawned, as used for a
+    pool of workers.  Samples are taken in a background thread when
+    started, so events are emitted from that thread.
+
+    >>> monitor = Monitor(spawner, interval=5, restart=True, rss=2**30)
+    ... monitor.start()
+    ... monitor.snapshot()
+    {4242: Sample(pid=4242, name='worker-1', ..., rss=52297728, ...)}
+    """
+    def __init__(self, spawner, interval=1., restart=False, hysteresis=.1,
+                 **limits):
+        super().__init__()
+        for name in limits:
+            if name not in Sample._fields + ('ctx',):
+                raise ValueError('can not limit unknown field %r' % name)
+        self.spawner = spawner
+        self.interval = interval
+        self.restart = restart
+        self.hysteresis = hysteresis
+        self.limits = limits
+        self.samples = {}
+        self.breached = set()
+        self.thread = None
+        self.stopped = threading.Event()
+
+    def sample(self):
+        """ take a sample of all children and check the limits """
+        samples = {}
+        for pid, (proc, _) in list(self.spawner.children.items()):
+            try:
+                sample = sample_proc(pid, proc.name, self.samples.get(pid))
+            except OSError:
+                continue
+            samples[pid] = sample
+        self.samples = samples
+
+        # forget breaches of children that are gone
+        self.breached = {key for key in self.breached if key[0] in samples}
+        for pid, sample in samples.items():
+            for name, limit in self.limits.items():
+                value = getattr(sample, name)
+                key = pid, name
+                if key in self.breached:
+                    if value <= limit * (1 - self.hysteresis):
+                        self.breached.discard(key)
+                elif value > limit:
+                    self.breached.add(key)
+                    self.exceeded(sample, name, value, limit)
+                    if self.restart:
+                        # the sample is of the replaced process
+                        break
+        return samples
+
+    def snapshot(self):
+        """ latest samples of the children by pid """
+        return dict(self.samples)
+
+    @emitting
+    def exceeded(self, sample, name, value, limit):
+        """ a child exceeded a limit, returning the restarted process """
+        self.__log.warning('%s (%s) exceeded %s limit: %s > %s',
+                           sample.name, sample.pid, name, value, limit)
+        if self.restart:
+            proc, _ = self.spawner.children[sample.pid]
+            return self.spawner.respawn(proc)
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            try:
+                self.sample()
+            except Exception:
+                self.__log.exception('failed to sample children')
+
+    def start(self):
+        """ start sampling in a background thread """
+        self.stopped.clear()
+        self.thread = threading.Thread(target=self.run, daemon=True,
+                                       name='spawner-monitor')
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.stopped.set()
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
@@ -1,11 +1,14 @@
 from functools import wraps
-import inspect
 
 from .annotate import Annotate, ObjDescr, Cache, Set
 
 
 class Observable:
-    """ Observable mixing so others can subscribe to an object """
+    """
+    Observable mixing so others can subscribe to an object,
+    events are also recorded when a `journal` is set
+    """
+    journal = None
 
     def __init__(self, *args, **kws):
         super().__init__(*args, **kws)
@@ -14,6 +17,8 @@ class Observable:
     def notify(self, event):
         for obs in self.observers:
             obs.notify(event)
+        if self.journal is not None:
+            self.journal.record(event)
 
     def subscribe(self, observer):
         self.observers.append(observer)
@@ -24,6 +29,7 @@ class Observable:
 
 def emitting(f):
     """ emit event on method call """
+    import inspect
     spec = inspect.getfullargspec(f)
 
     @wraps(f)
@@ -34,6 +40,7 @@ def emitting(f):
         return result
 
     emit.__event__ = f.__name__
+    emit.__argspec__ = spec
     return emit
 
 
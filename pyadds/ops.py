@@ -1,6 +1,8 @@
 from functools import wraps
 import operator
 
+from .meta.ops import Ops, _Operators, autowraped_ops as _autowraped_ops
+
 
 def opsame(op):
     """ checks for type mismatch between first and second argument"""
@@ -92,17 +94,15 @@ def autowraped_ops(cls, by=None, reflect=True):
     mixin : type
         dynamic mixin class with operator definitions
     """
-    ops = {}
-    special = set(dir(object))
-    for name in dir(operator):
-        if (name in special or
-                not name.startswith('__') or not name.endswith('__')):
-            continue
-        rname = '__r{}__'.format(name.strip('_'))
-
-        if hasattr(cls, name):
-            ops[name] = mkop_wraped(cls, name, by=by)
-            if reflect:
-                ops[rname] = mkop_reflect(cls, name, by=by)
-
-    return type('Fwd' + cls.__name__, (object,), ops)
+    return _autowraped_ops(cls, by=by, reflect=reflect,
+                           table=dunder_operators, exclude=(), native=False)
+
+
+dunder_operators = _Operators(
+    'dunder_operators',
+    Ops('operator', tuple((name.strip('_'), 2,
+                           '{}({{}}, {{}})'.format(name.strip('_')))
+                          for name in dir(operator)
+                          if name.startswith('__') and name.endswith('__')
+                          and name not in set(dir(object))
+                          and callable(getattr(operator, name))), True))
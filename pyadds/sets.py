@@ -0,0 +1,483 @@
+"""
+symbolic set algebra with a universal set, complements and finite sets
+
+`Anything` is the universe, `Complement` holds everything except a finite
+set and finite sets are plain (frozen)sets.  All operators work across the
+family, e.g. `Anything - {1}` is a `Complement` and `{1, 2} & Anything` is
+`{1, 2}`.  For sets of a known vocabulary `Symbols` interns the elements so
+sets are bitsets and the operators are integer bit operations.
+"""
+from collections.abc import Set
+import operator
+
+
+def _finite(other):
+    if isinstance(other, AnythingType):
+        return None
+    if isinstance(other, Set):
+        return frozenset(other)
+    return None
+
+
+def _operand(other):
+    # sets of this module stay as they are, other iterables become frozensets
+    if isinstance(other, (AnythingType, Complement, BitSet, Set)):
+        return other
+    return frozenset(other)
+
+
+class SetMethods:
+    """ method forms of the set operators, accepting any iterables """
+    __slots__ = ()
+
+    def intersection(self, *others):
+        result = self
+        for other in others:
+            result = result & _operand(other)
+        return result
+
+    def union(self, *others):
+        result = self
+        for other in others:
+            result = result | _operand(other)
+        return result
+
+    def difference(self, *others):
+        result = self
+        for other in others:
+            result = result - _operand(other)
+        return result
+
+    def issubset(self, other):
+        return self <= _operand(other)
+
+    def issuperset(self, other):
+        return self >= _operand(other)
+
+
+class AnythingType(SetMethods):
+    """
+    the universal set containing anything
+
+    It is no `set` subclass, so the builtin sets leave their operators with
+    it to the reflected operators defined here.
+    """
+    def __contains__(self, other):
+        return True
+
+    def __bool__(self):
+        return True
+
+    def __and__(self, other):
+        return other
+
+    __rand__ = __and__
+
+    def __or__(self, other):
+        return self
+
+    __ror__ = __or__
+
+    def __sub__(self, other):
+        if other is self or isinstance(other, (AnythingType, Complement,
+                                               BitSet)):
+            return ~other
+        return Complement(other)
+
+    def __rsub__(self, other):
+        return frozenset()
+
+    def __xor__(self, other):
+        return self - other
+
+    __rxor__ = __xor__
+
+    def __invert__(self):
+        return frozenset()
+
+    def __le__(self, other):
+        return isinstance(other, AnythingType) or (
+            isinstance(other, BitSet) and other.negated and not other.mask)
+
+    def __ge__(self, other):
+        return True
+
+    def __lt__(self, other):
+        return False
+
+    def __gt__(self, other):
+        return not self <= other
+
+    def __eq__(self, other):
+        return self <= other
+
+    def __ne__(self, other):
+        return not self == other
+
+    __hash__ = object.__hash__
+
+    def __str__(self):
+        return '*'
+
+    def __repr__(self):
+        return "Anything"
+
+    def __reduce__(self):
+        return 'Anything'
+
+
+Anything = AnythingType()
+
+
+class Complement(SetMethods):
+    """ set of everything except a finite set of excluded elements """
+    __slots__ = ('excluded',)
+
+    def __new__(cls, excluded=()):
+        excluded = frozenset(excluded)
+        if not excluded:
+            return Anything
+        self = super().__new__(cls)
+        self.excluded = excluded
+        return self
+
+    def __reduce__(self):
+        # the default reduction creates it without exclusions, as Anything
+        return Complement, (self.excluded,)
+
+    def __contains__(self, item):
+        return item not in self.excluded
+
+    def __bool__(self):
+        return True
+
+    def __invert__(self):
+        return self.excluded
+
+    def __and__(self, other):
+        if isinstance(other, Complement):
+            return Complement(self.excluded | other.excluded)
+        finite = _finite(other)
+        if finite is None:
+            return NotImplemented
+        return finite - self.excluded
+
+    __rand__ = __and__
+
+    def __or__(self, other):
+        if isinstance(other, Complement):
+            return Complement(self.excluded & other.excluded)
+        finite = _finite(other)
+        if finite is None:
+            return NotImplemented
+        return Complement(self.excluded - finite)
+
+    __ror__ = __or__
+
+    def __sub__(self, other):
+        if isinstance(other, Complement):
+            return other.excluded - self.excluded
+        finite = _finite(other)
+        if finite is None:
+            return NotImplemented
+        return Complement(self.excluded | finite)
+
+    def __rsub__(self, other):
+        finite = _finite(other)
+        if finite is None:
+            return NotImplemented
+        return finite & self.excluded
+
+    def __xor__(self, other):
+        if isinstance(other, Complement):
+            return self.excluded ^ other.excluded
+        finite = _finite(other)
+        if finite is None:
+            return NotImplemented
+        return Complement(self.excluded ^ finite)
+
+    __rxor__ = __xor__
+
+    def __le__(self, other):
+        if isinstance(other, Complement):
+            return other.excluded <= self.excluded
+        return False if _finite(other) is not None else NotImplemented
+
+    def __ge__(self, other):
+        if isinstance(other, Complement):
+            return self.excluded <= other.excluded
+        finite = _finite(other)
+        if finite is None:
+            return NotImplemented
+        return finite.isdisjoint(self.excluded)
+
+    def __lt__(self, other):
+        return self <= other and self != other
+
+    def __gt__(self, other):
+        return self >= other and self != other
+
+    def __eq__(self, other):
+        if isinstance(other, Complement):
+            return self.excluded == other.excluded
+        return False if _finite(other) is not None else NotImplemented
+
+    def __hash__(self):
+        return hash((Complement, self.excluded))
+
+    def __str__(self):
+        return '*-{{{}}}'.format(', '.join(map(str, self.excluded)))
+
+    def __repr__(self):
+        return 'Complement({!r})'.format(set(self.excluded))
+
+
+class Symbols:
+    """
+    interned vocabulary of elements for `BitSet`s
+
+    Every element gets a bit on first use, so sets of these elements are
+    represented by integers.  Complements stay correct when new elements are
+    interned later, as they are kept as negated bitsets.  For the hottest
+    filters `bit` and `intern` give the plain integer masks.  Combining
+    bitsets with plain sets does not intern their elements, results with
+    unknown elements stay plain sets.
+
+    >>> caps = Symbols()
+    >>> read, write = caps('read'), caps('write', 'read')
+    >>> read & write
+    BitSet({'read'})
+    >>> 'exec' in caps.anything - write
+    True
+    """
+    def __init__(self, elements=()):
+        self.bits = {}
+        self.elements = []
+        self.anything = BitSet(self, 0, True)
+        self.nothing = BitSet(self, 0, False)
+        self.intern(elements)
+
+    def bit(self, element):
+        """ bit of an element, interning it """
+        try:
+            return self.bits[element]
+        except KeyError:
+            bit = self.bits[element] = 1 << len(self.elements)
+            self.elements.append(element)
+            return bit
+
+    def intern(self, elements):
+        """ mask of the elements, interning them """
+        bit = self.bit
+        mask = 0
+        for element in elements:
+            mask |= bit(element)
+        return mask
+
+    def known(self, elements):
+        """ mask of the elements, None if any of them is not interned """
+        bits = self.bits
+        mask = 0
+        try:
+            for element in elements:
+                mask |= bits[element]
+        except KeyError:
+            return None
+        return mask
+
+    def known_set(self, elements):
+        """
+        bitset of a plain set when all its elements are interned,
+        otherwise the plain set
+        """
+        if isinstance(elements, AnythingType):
+            return self.anything
+        negated = isinstance(elements, Complement)
+        mask = self.known(elements.excluded if negated else elements)
+        if mask is None:
+            return elements
+        return BitSet(self, mask, negated)
+
+    def elements_of(self, mask):
+        """ iterator over the elements of a mask """
+        elements = self.elements
+        while mask:
+            low = mask & -mask
+            yield elements[low.bit_length() - 1]
+            mask ^= low
+
+    def __call__(self, *elements):
+        return BitSet(self, self.intern(elements))
+
+    def set(self, elements):
+        """ bitset of an iterable, converting `Anything` and `Complement` """
+        if isinstance(elements, BitSet):
+            return elements
+        if isinstance(elements, AnythingType):
+            return self.anything
+        if isinstance(elements, Complement):
+            return BitSet(self, self.intern(elements.excluded), True)
+        return BitSet(self, self.intern(elements))
+
+    def __len__(self):
+        return len(self.elements)
+
+
+class BitSet(SetMethods):
+    """
+    set over interned `Symbols`, with `negated` it holds everything except
+    the elements of the mask
+    """
+    __slots__ = ('symbols', 'mask', 'negated', '_hash')
+
+    def __init__(self, symbols, mask=0, negated=False):
+        self.symbols = symbols
+        self.mask = mask
+        self.negated = negated
+        self._hash = None
+
+    def _other(self, other):
+        # bitset of a set over other or no symbols, None when it holds
+        # elements the symbols do not know, so they are not interned
+        if isinstance(other, BitSet):
+            other = other.plain()
+        if isinstance(other, AnythingType):
+            return self.symbols.anything
+        negated = isinstance(other, Complement)
+        elements = other.excluded if negated else _finite(other)
+        if elements is None:
+            return NotImplemented
+        mask = self.symbols.known(elements)
+        if mask is None:
+            return None
+        return BitSet(self.symbols, mask, negated)
+
+    def _foreign(self, method, op, other, reflected=False):
+        converted = self._other(other)
+        if converted is None:
+            # fall back to the plain set algebra
+            if isinstance(other, BitSet):
+                other = other.plain()
+            if reflected:
+                result = op(other, self.plain())
+            else:
+                result = op(self.plain(), other)
+            if isinstance(result, bool) or result is NotImplemented:
+                return result
+            return self.symbols.known_set(result)
+        if converted is NotImplemented:
+            return NotImplemented
+        return method(self, converted)
+
+    def plain(self):
+        """ the set as frozenset, `Complement` or `Anything` """
+        if self.negated:
+            return Complement(self.symbols.elements_of(self.mask))
+        return frozenset(self.symbols.elements_of(self.mask))
+
+    def __contains__(self, element):
+        if self.mask & self.symbols.bits.get(element, 0):
+            return not self.negated
+        return self.negated
+
+    def __bool__(self):
+        return self.negated or bool(self.mask)
+
+    def __len__(self):
+        if self.negated:
+            raise TypeError('complement set has no finite length')
+        return bin(self.mask).count('1')
+
+    def __iter__(self):
+        if self.negated:
+            raise TypeError('complement set can not be iterated')
+        return self.symbols.elements_of(self.mask)
+
+    def __invert__(self):
+        return BitSet(self.symbols, self.mask, not self.negated)
+
+    def __and__(self, other):
+        if type(other) is not BitSet or other.symbols is not self.symbols:
+            return self._foreign(BitSet.__and__, operator.and_, other)
+        a, b = self.mask, other.mask
+        if self.negated:
+            if other.negated:
+                return BitSet(self.symbols, a | b, True)
+            return BitSet(self.symbols, b & ~a)
+        if other.negated:
+            return BitSet(self.symbols, a & ~b)
+        return BitSet(self.symbols, a & b)
+
+    __rand__ = __and__
+
+    def __or__(self, other):
+        if type(other) is not BitSet or other.symbols is not self.symbols:
+            return self._foreign(BitSet.__or__, operator.or_, other)
+        a, b = self.mask, other.mask
+        if self.negated:
+            if other.negated:
+                return BitSet(self.symbols, a & b, True)
+            return BitSet(self.symbols, a & ~b, True)
+        if other.negated:
+            return BitSet(self.symbols, b & ~a, True)
+        return BitSet(self.symbols, a | b)
+
+    __ror__ = __or__
+
+    def __sub__(self, other):
+        if type(other) is not BitSet or other.symbols is not self.symbols:
+            return self._foreign(BitSet.__sub__, operator.sub, other)
+        return self & ~other
+
+    def __rsub__(self, other):
+        if type(other) is not BitSet or other.symbols is not self.symbols:
+            return self._foreign(BitSet.__rsub__, operator.sub, other,
+                                 reflected=True)
+        return other & ~self
+
+    def __xor__(self, other):
+        if type(other) is not BitSet or other.symbols is not self.symbols:
+            return self._foreign(BitSet.__xor__, operator.xor, other)
+        return BitSet(self.symbols, self.mask ^ other.mask,
+                      self.negated != other.negated)
+
+    __rxor__ = __xor__
+
+    def __le__(self, other):
+        if type(other) is not BitSet or other.symbols is not self.symbols:
+            return self._foreign(BitSet.__le__, operator.le, other)
+        a, b = self.mask, other.mask
+        if self.negated:
+            return other.negated and not b & ~a
+        if other.negated:
+            return not a & b
+        return not a & ~b
+
+    def __ge__(self, other):
+        if type(other) is not BitSet or other.symbols is not self.symbols:
+            return self._foreign(BitSet.__ge__, operator.ge, other)
+        return other <= self
+
+    def __lt__(self, other):
+        return self <= other and self != other
+
+    def __gt__(self, other):
+        return self >= other and self != other
+
+    def __eq__(self, other):
+        if type(other) is not BitSet or other.symbols is not self.symbols:
+            return self._foreign(BitSet.__eq__, operator.eq, other)
+        return self.mask == other.mask and self.negated == other.negated
+
+    def __hash__(self):
+        # equal to the hash of the plain set, as they compare equal
+        if self._hash is None:
+            self._hash = hash(self.plain())
+        return self._hash
+
+    def __repr__(self):
+        if self.negated:
+            if not self.mask:
+                return 'BitSet(Anything)'
+            return 'BitSet(Anything - {!r})'.format(set(~self))
+        return 'BitSet({!r})'.format(set(self))
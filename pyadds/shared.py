@@ -0,0 +1,351 @@
+"""
+values shared between processes through named shared memory segments
+
+A segment starts with a small header holding its state, the kind of its
+payload and a reference count of the processes attached to it.  NumPy arrays
+are stored as raw buffer and attached as read-only views without copying,
+other values are pickled and unpickled once in each attaching process.
+"""
+import hashlib
+import itertools
+import os
+import pickle
+import struct
+import tempfile
+import time
+
+from .logging import log
+
+__cache__ = None
+
+header = struct.Struct('<BBBxqQQ')
+offset = 64
+
+WRITING, READY = 0, 1
+PICKLED, ARRAY = 0, 1
+
+_counter = itertools.count()
+
+
+def _is_array(value):
+    cls = type(value)
+    return (cls.__module__ == 'numpy' and cls.__name__ == 'ndarray'
+            and not value.dtype.hasobject)
+
+
+def _align(n, to=offset):
+    return -(-n // to) * to
+
+
+def _alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def encode(value):
+    """
+    encode a value for storing it in shared memory
+
+    Returns
+    -------
+    (kind, meta, payload)
+        kind of the payload, pickled meta data and a buffer of the payload
+    """
+    if _is_array(value):
+        import numpy as np
+        value = np.ascontiguousarray(value)
+        meta = pickle.dumps((value.dtype.str, value.shape))
+        return ARRAY, meta, memoryview(value).cast('B')
+    return PICKLED, b'', memoryview(pickle.dumps(value,
+                                                  pickle.HIGHEST_PROTOCOL))
+
+
+def decode(kind, buf, meta_len, length):
+    """ decode a value from a shared memory buffer, arrays are not copied """
+    if kind == ARRAY:
+        import numpy as np
+        dtype, shape = pickle.loads(buf[offset:offset+meta_len])
+        array = np.ndarray(shape, dtype=np.dtype(dtype), buffer=buf,
+                           offset=offset+_align(meta_len))
+        array.flags.writeable = False
+        return array
+    return pickle.loads(buf[offset:offset+length])
+
+
+@log
+class SharedCache:
+    """
+    mapping of keys to values published in named shared memory segments
+
+    Setting a key creates the segment and publishes the value, getting a key
+    attaches to the segment once per process.  Each attached process counts
+    as a reference, `release` drops the references of this process and
+    `close` marks all segments so they get unlinked when the last reference
+    is dropped.
+
+    Parameters
+    ----------
+    prefix : str
+        prefix of the segment names, unique for the process tree by default
+    lock : Lock
+        lock shared by all processes, guarding the reference counts,
+        a new multiprocessing lock by default
+    timeout : float
+        seconds to wait for a segment that is still written by another process
+    """
+    def __init__(self, prefix=None, lock=None, timeout=10.):
+        if prefix is None:
+            prefix = 'pyadds{}.{}'.format(os.getpid(), next(_counter))
+        import multiprocessing
+        from multiprocessing import resource_tracker
+        self.prefix = prefix
+        # locks of the fork context can not be passed to spawned children
+        self.lock = lock or multiprocessing.get_context('spawn').Lock()
+        self.timeout = timeout
+        self.local = {}
+        self.pid = os.getpid()
+
+        # start the tracker before forking, so children do not start their
+        # own one, unlinking the segments when they exit
+        resource_tracker.ensure_running()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['local'] = {}
+        return state
+
+    def adopt(self):
+        """ forget references inherited from the parent when forked """
+        if self.pid != os.getpid():
+            self.local = {}
+            self.pid = os.getpid()
+
+    def segment(self, key):
+        """ name of the segment for a key """
+        digest = hashlib.blake2b(key.encode(), digest_size=8).hexdigest()
+        return '{}.{}'.format(self.prefix, digest)
+
+    def _refer(self, shm, delta):
+        with self.lock:
+            state, kind, closing, refs, length, meta_len = \
+                header.unpack_from(shm.buf)
+            refs += delta
+            header.pack_into(shm.buf, 0, state, kind, closing,
+                             refs, length, meta_len)
+        return refs, closing
+
+    def _attach(self, key):
+        from multiprocessing.shared_memory import SharedMemory
+        deadline = time.monotonic() + self.timeout
+        while True:
+            try:
+                shm = SharedMemory(self.segment(key))
+            except FileNotFoundError:
+                raise KeyError(key) from None
+            except ValueError:
+                # created, but not yet resized by the publishing process
+                shm = None
+
+            if shm is not None:
+                if shm.buf[0] == READY:
+                    break
+                shm.close()
+            if time.monotonic() > deadline:
+                raise TimeoutError('shared value {} was never published'
+                                   .format(key))
+            time.sleep(.001)
+
+        _, kind, closing, _, length, meta_len = header.unpack_from(shm.buf)
+        if closing:
+            shm.close()
+            raise KeyError(key)
+        value = decode(kind, shm.buf, meta_len, length)
+        self._refer(shm, +1)
+        self.local[key] = value, shm
+        return value
+
+    def __getitem__(self, key):
+        try:
+            return self.local[key][0]
+        except KeyError:
+            return self._attach(key)
+
+    def __setitem__(self, key, value):
+        from multiprocessing.shared_memory import SharedMemory
+        if key in self.local:
+            raise KeyError('shared value {} is already published'.format(key))
+
+        kind, meta, payload = encode(value)
+        start = offset + _align(len(meta)) if kind == ARRAY else offset
+        try:
+            shm = SharedMemory(self.segment(key), create=True,
+                               size=max(start + payload.nbytes, offset+1))
+        except FileExistsError:
+            # published concurrently by another process, which wins
+            self.__log.debug('shared value %s was published concurrently',
+                             key)
+            self._attach(key)
+            return
+
+        shm.buf[offset:offset+len(meta)] = meta
+        shm.buf[start:start+payload.nbytes] = payload
+        header.pack_into(shm.buf, 0, WRITING, kind, False, 1,
+                         payload.nbytes, len(meta))
+        shm.buf[0] = READY
+
+        if kind == ARRAY:
+            value = decode(kind, shm.buf, len(meta), payload.nbytes)
+        self.local[key] = value, shm
+
+    def _claim(self, key):
+        # a plain file, as attaching to segments registers them for cleanup
+        path = os.path.join(tempfile.gettempdir(),
+                            self.segment(key) + '.claim')
+        try:
+            fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            try:
+                with open(path) as f:
+                    pid = int(f.read() or 0)
+            except (FileNotFoundError, ValueError):
+                return None
+            if pid and not _alive(pid):
+                # claimed by a process that died meanwhile
+                _remove(path)
+            return None
+        with os.fdopen(fd, 'w') as f:
+            f.write(str(os.getpid()))
+        return path
+
+    def compute(self, key, factory):
+        """
+        get the value of a key, computing it with `factory` and publishing it
+        when no process published it before
+
+        Only one process computes the value, the others wait until it is
+        published.
+        """
+        while True:
+            try:
+                return self[key]
+            except KeyError:
+                pass
+
+            claim = self._claim(key)
+            if claim is None:
+                time.sleep(.001)
+                continue
+
+            try:
+                if key in self:
+                    return self[key]
+                self[key] = factory()
+                return self[key]
+            finally:
+                _remove(claim)
+
+    def __contains__(self, key):
+        if key in self.local:
+            return True
+        try:
+            self._attach(key)
+        except KeyError:
+            return False
+        return True
+
+    def _drop(self, shm):
+        refs, closing = self._refer(shm, -1)
+        try:
+            shm.close()
+        except BufferError:
+            self.__log.warning('shared segment %s still in use by views',
+                               shm.name)
+        if closing and refs <= 0:
+            self._unlink(shm)
+
+    def _unlink(self, shm):
+        try:
+            shm.unlink()
+        except FileNotFoundError:
+            pass
+
+    def pop(self, key, default=None):
+        """ forget the value of this process, dropping its reference """
+        try:
+            value, shm = self.local.pop(key)
+        except KeyError:
+            return default
+        self._drop(shm)
+        return value
+
+    def release(self):
+        """ drop all references of this process """
+        for key in list(self.local):
+            self.pop(key)
+
+    def _names(self):
+        try:
+            return [name for name in os.listdir('/dev/shm')
+                    if name.startswith(self.prefix + '.')]
+        except FileNotFoundError:
+            return [shm.name.lstrip('/') for _, shm in self.local.values()]
+
+    def close(self, keys=None):
+        """
+        release this process and unlink all segments of this cache, or only
+        the ones of `keys`, once they are not referenced any more
+        """
+        from multiprocessing.shared_memory import SharedMemory
+        if keys is None:
+            names = self._names()
+        else:
+            keys = list(keys)
+            names = [self.segment(key) for key in keys]
+        for name in names:
+            try:
+                shm = SharedMemory(name)
+            except FileNotFoundError:
+                continue
+            with self.lock:
+                state, kind, _, refs, length, meta_len = \
+                    header.unpack_from(shm.buf)
+                header.pack_into(shm.buf, 0, state, kind, True,
+                                 refs, length, meta_len)
+            shm.close()
+            if refs <= 0:
+                self._unlink(shm)
+        if keys is None:
+            self.release()
+        else:
+            for key in keys:
+                self.pop(key)
+
+
+def install(cache):
+    """ use a cache for the `shared` descriptors of this process """
+    global __cache__
+    cache.adopt()
+    __cache__ = cache
+    return cache
+
+
+def current(create=True):
+    """
+    cache used by the `shared` descriptors of this process, creating it on
+    first use unless `create` is false
+    """
+    if __cache__ is None and create:
+        install(SharedCache())
+    return __cache__
@@ -1,8 +1,12 @@
-import asyncio
-import multiprocessing as mp
+import logging
+import types
+import time
+import os
 
-from .annotate import refers
-from .logging import log
+from .annotate import refers, shared
+from .logging import log, PipeHandler, PipeListener
+from .shared import install, current
+from .timing import tracing
 
 __spawner__ = None
 
@@ -24,13 +28,64 @@ def caller(obj, name, args=(), kws={}):
 
 @log
 class Spawner:
-    def __init__(self, method='spawn'):
+    """
+    spawns processes calling methods of objects
+
+    With `aggregate_logs` the log records of the children are sent in
+    batches through one pipe to the spawning process, where they are handled
+    by its loggers, so only the parents handler configuration applies.  The
+    records keep `processName` and `process` of the worker they came from.
+
+    With `trace_dir` the entry of each child is traced and the childs
+    `pyadds.timing.tracing` events are saved as `trace-<pid>.json` inside
+    this directory when it is done, see `load_traces`.
+
+    The values of `pyadds.annotate.shared` descriptors are published in the
+    `pyadds.shared.current` cache, which is passed to the children, so they
+    are computed once by the parent or the first child and attached by the
+    others.  The segments of the values of objects spawned by this spawner
+    are unlinked on `shutdown` once no child is attached any more, other
+    values of the cache are kept.
+    """
+    def __init__(self, method='spawn', aggregate_logs=True, trace_dir=None):
         self.method = method
         self.setups = []
+        self.aggregate_logs = aggregate_logs
+        self.trace_dir = trace_dir
+        self.logs = None
+        self.log_level = logging.NOTSET
+        self.shared = None
+        self.published = set()
 
     @refers
     def mp(self):
-        return mp.get_context(self.method)
+        import multiprocessing
+        return multiprocessing.get_context(self.method)
+
+    @refers
+    def children(self):
+        """ spawned processes and how they were spawned by pid """
+        return {}
+
+    @refers
+    def log_listener(self):
+        self.logs = self.mp.SimpleQueue()
+        listener = PipeListener(self.logs)
+        listener.start()
+        return listener
+
+    def shutdown(self):
+        """
+        stop receiving the log records of the children and unlink the shared
+        values once they are released
+        """
+        if self.published:
+            self.shared.close(self.published)
+            self.published.clear()
+        if Spawner.log_listener.has_entry(self):
+            self.log_listener.stop()
+            del self.log_listener
+            self.logs = None
 
     def add_setup(self, setup):
         """ add a setup routine """
@@ -41,40 +96,120 @@ class Spawner:
         self.setups.remove(setup)
 
     def _setup(self):
+        if self.shared is not None:
+            install(self.shared)
+        if self.logs is not None:
+            # replace handlers inherited from the parent when forking
+            root = logging.getLogger()
+            root.handlers = [PipeHandler(self.logs)]
+            root.setLevel(self.log_level)
         for setup in self.setups:
             setup()
 
+    def _teardown(self):
+        if self.shared is not None:
+            self.shared.release()
+        if self.trace_dir:
+            tracing.save(os.path.join(self.trace_dir,
+                                      'trace-{}.json'.format(os.getpid())))
+        for handler in logging.getLogger().handlers:
+            if isinstance(handler, PipeHandler):
+                handler.flush()
+
+    def load_traces(self, tracer=tracing):
+        """ load the trace events saved by the children into a tracer """
+        tracer.load(*(os.path.join(self.trace_dir, name)
+                      for name in os.listdir(self.trace_dir)
+                      if name.startswith('trace-')))
+        return tracer
+
     def _entry(self, obj, name, args, kws):
         self._setup()
-        res = caller(obj, name, args, kws)
-        self.__log.info('%s done, returned %s', name, res)
+        start = time.perf_counter_ns()
+        try:
+            res = caller(obj, name, args, kws)
+            self.__log.info('%s done, returned %s', name, res)
+        finally:
+            if self.trace_dir:
+                tracing.complete(name, start, time.perf_counter_ns() - start,
+                                 cat='entry')
+            self._teardown()
 
     def _coentry(self, obj, name, args, kws):
+        import asyncio
         self._setup()
-        coro = getattr(obj, name)
-        main = asyncio.async(coro(*args, **kws))
-        asyncio.get_event_loop().run_forever()
-        if main.done():
-            self.__log.info('%s done, returned %s', name, main.result())
-        else:
-            self.__log.info('%s canceld, asyncio loop was closed', name)
+        start = time.perf_counter_ns()
+        try:
+            coro = getattr(obj, name)
+            loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(loop)
+            main = loop.create_task(coro(*args, **kws))
+            loop.run_forever()
+            if main.done():
+                self.__log.info('%s done, returned %s', name, main.result())
+            else:
+                self.__log.info('%s canceld, asyncio loop was closed', name)
+        finally:
+            if self.trace_dir:
+                tracing.complete(name, start, time.perf_counter_ns() - start,
+                                 cat='entry')
+            self._teardown()
 
     def _do_spawn(self, entry, method, args, kws, __name__=None):
         """ calls a method inside a newly create process, returning the pid """
         obj = method.__self__
         name = method.__name__
 
+        descs = list(shared.iter(obj))
+        for desc in descs:
+            # create the key now, so the children get it with the object
+            desc.key(obj)
+        if self.shared is None:
+            self.shared = current(create=bool(descs))
+        self.published.update(desc.lookup(obj)[1] for desc in descs)
+
+        if self.aggregate_logs:
+            self.log_listener
+            self.log_level = logging.getLogger().getEffectiveLevel()
+
         proc = self.mp.Process(target=caller,
                                args=(self, entry, (obj, name, args, kws)),
                                name=__name__)
         proc.start()
+        self.children[proc.pid] = proc, (entry, method, args, kws, __name__)
         return proc
 
+    def respawn(self, proc, timeout=5):
+        """
+        terminate a spawned process and spawn it again the same way,
+        killing it when it did not terminate within `timeout` seconds
+        """
+        _, spec = self.children.pop(proc.pid)
+        proc.terminate()
+        proc.join(timeout)
+        if proc.is_alive():
+            self.__log.warning('%s (%s) did not terminate, killing it',
+                               proc.name, proc.pid)
+            proc.kill()
+            proc.join()
+        entry, method, args, kws, name = spec
+        self.__log.info('respawning %s (%s)', name or method.__name__, proc.pid)
+        return self._do_spawn(entry, method, args, kws, __name__=name)
+
+    def reap(self):
+        """ forget about finished processes, returning them """
+        done = [proc for proc, _ in self.children.values()
+                if not proc.is_alive()]
+        for proc in done:
+            del self.children[proc.pid]
+        return done
+
     def spawn(self, method, *args, __name__=None, **kws):
         """ spawn a process and call a method inside it """
         return self._do_spawn('_entry', method, args, kws, __name__=__name__)
 
-    @asyncio.coroutine
+    @types.coroutine
     def cospawn(self, coro, *args, __name__=None, **kws):
         """ spawn a process and call a coroutine inside it """
         return self._do_spawn('_coentry', coro, args, kws, __name__=__name__)
+        yield
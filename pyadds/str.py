@@ -1,6 +1,16 @@
+from functools import lru_cache
+from itertools import islice
 import re
 
+# zero-width split positions, so the regex engine does not need to capture
+_camel = re.compile(r'(?<=[a-z])(?=[A-Z0-9])|(?<=.)(?=[A-Z0-9][a-z])', re.S)
+# line-wise for joined phrases, as `.` does not match the newlines
+_camel_lines = re.compile(_camel.pattern)
+_nonword = re.compile(r'\W')
+_consonants = re.compile('[bcdfghjklmnpqrstvwxyz]')
 
+
+@lru_cache(maxsize=4096)
 def uncamel(phrase, sep='-'):
     """
     converts camelcase phrase into seperated lower-case phrase
@@ -17,7 +27,34 @@ def uncamel(phrase, sep='-'):
     >>> uncamel('StatusCode404', sep=' ')
         'status code 404'
     """
-    return re.sub(r'((?<=[a-z])[A-Z0-9]|(?!^)[A-Z0-9](?=[a-z]))', sep + r'\1', phrase).lower()
+    return _camel.sub(sep, phrase).lower()
+
+
+def uncamel_all(phrases, sep='-', chunk=4096):
+    """
+    converts an iterable of camelcase phrases in one streaming pass
+
+    The phrases are converted chunk-wise with a single substitution on the
+    joined chunk, so phrases must not contain newlines.
+
+    Parameters
+    ---
+    phrases : iterable
+        phrases to convert, e.g. a list or numpy array of str
+    chunk : int
+        number of phrases converted at once
+
+    Examples
+    ---
+    >>> list(uncamel_all(['HTTPRequestHeader', 'StatusCode404']))
+        ['http-request-header', 'status-code-404']
+    """
+    phrases = iter(phrases)
+    while True:
+        part = list(islice(phrases, chunk))
+        if not part:
+            return
+        yield from _camel_lines.sub(sep, '\n'.join(part)).lower().split('\n')
 
 
 def splitcamel(phrase):
@@ -34,7 +71,15 @@ def name_of(obj):
         return uncamel(cls.__name__)
 
 
+def names_of(objs):
+    """ `name_of` for an iterable of objects """
+    return map(name_of, objs)
+
+
+@lru_cache(maxsize=4096)
+def _abbrev(name, n):
+    return ''.join(_consonants.findall(_nonword.sub('', name))[:n])
+
+
 def abbrev(obj, n=3):
-    name = re.sub(r'\W', '', name_of(obj))
-    cons = re.findall('[bcdfghjklmnpqrstvwxyz]', name)
-    return ''.join(cons[:n])
+    return _abbrev(name_of(obj), n)
@@ -1,21 +1,510 @@
 from contextlib import contextmanager
+from collections import deque, defaultdict, namedtuple
+from functools import wraps
+import contextvars
+import threading
+import types
 import time
+import os
+
+_clock = time.perf_counter_ns
+
+
+def format_ns(ns):
+    """ format nanoseconds with a fitting unit """
+    for unit, scale in (('s', 1e9), ('ms', 1e6), ('us', 1e3)):
+        if ns >= scale:
+            return '{:.3g}{}'.format(ns / scale, unit)
+    return '{:.0f}ns'.format(ns)
+
+
+def format_bytes(n):
+    """ format a number of bytes with a fitting unit """
+    for unit, scale in (('GB', 1 << 30), ('MB', 1 << 20), ('kB', 1 << 10)):
+        if abs(n) >= scale:
+            return '{:.3g}{}'.format(n / scale, unit)
+    return '{}B'.format(n)
+
+
+class MemStep(namedtuple('MemStep', 'current delta peak top')):
+    """
+    memory of a trace step, with the current and peak size and the change
+    since the previous step in bytes, `top` lists (site, delta) of the
+    allocation sites that grew the most
+    """
+    def __str__(self):
+        return ('-' if self.delta < 0 else '+') + format_bytes(abs(self.delta))
+
+
+class AllocTracker:
+    """ memory of steps from `tracemalloc`, including allocation sites """
+    def __init__(self, top=5, frames=1):
+        import tracemalloc
+        self.ignore = [tracemalloc.Filter(False, tracemalloc.__file__),
+                       tracemalloc.Filter(False, __file__)]
+        self.top = top
+        self.started = not tracemalloc.is_tracing()
+        if self.started:
+            tracemalloc.start(frames)
+        self.last = tracemalloc.take_snapshot().filter_traces(self.ignore)
+        tracemalloc.reset_peak()
+
+    def step(self):
+        import tracemalloc
+        snapshot = tracemalloc.take_snapshot().filter_traces(self.ignore)
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        stats = snapshot.compare_to(self.last, 'lineno')
+        self.last = snapshot
+        top = [(str(stat.traceback), stat.size_diff)
+               for stat in stats[:self.top] if stat.size_diff]
+        return MemStep(current, sum(stat.size_diff for stat in stats),
+                       peak, top)
+
+    def stop(self):
+        import tracemalloc
+        self.last = None
+        if self.started:
+            tracemalloc.stop()
+            self.started = False
+
+
+class RSSTracker:
+    """
+    memory of steps by sampling the resident set size from /proc
+
+    The peak is the high water mark of the resident set size, which is reset
+    after each step through /proc/self/clear_refs.  Where it can not be
+    reset, the peak is the one of the whole process lifetime.
+    """
+    pagesize = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+
+    def __init__(self):
+        self.resettable = True
+        self.reset_peak()
+        self.last = self.rss()
+
+    def reset_peak(self):
+        if self.resettable:
+            try:
+                with open('/proc/self/clear_refs', 'w') as f:
+                    f.write('5')
+            except OSError:
+                self.resettable = False
+
+    def rss(self):
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * self.pagesize
+
+    def peak(self):
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) * 1024
+        return 0
+
+    def step(self):
+        current = self.rss()
+        delta, self.last = current - self.last, current
+        peak = self.peak()
+        self.reset_peak()
+        return MemStep(current, delta, peak, [])
+
+    def stop(self):
+        pass
+
+
+trackers = {'tracemalloc': AllocTracker, 'rss': RSSTracker}
+
+
+class Histogram:
+    """
+    streaming histogram of durations in nanoseconds with bounded memory
+
+    Durations are counted in log-linear buckets, 16 per power of two, so
+    quantiles have a relative error of less than 1/32 while there are only
+    1024 buckets for durations up to 2^64ns.
+    """
+    __slots__ = ('count', 'total', 'max', 'buckets')
+
+    sub = 4
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0
+        self.max = 0
+        self.buckets = [0] * 1024
+
+    def add(self, ns):
+        shift = ns.bit_length() - 5
+        self.buckets[ns if shift <= 0 else (shift << 4) + (ns >> shift)] += 1
+        self.count += 1
+        self.total += ns
+        if ns > self.max:
+            self.max = ns
+
+    def extend(self, durations):
+        """ add several durations at once """
+        if not durations:
+            return
+        buckets = self.buckets
+        for ns in durations:
+            shift = ns.bit_length() - 5
+            buckets[ns if shift <= 0 else (shift << 4) + (ns >> shift)] += 1
+        self.count += len(durations)
+        self.total += sum(durations)
+        self.max = max(self.max, max(durations))
+
+    def value(self, bucket):
+        """ duration in the middle of a bucket """
+        shift = (bucket >> self.sub) - 1
+        if shift <= 0:
+            return bucket
+        return ((bucket - (shift << self.sub)) << shift) + (1 << shift - 1)
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else 0
+
+    def quantile(self, q):
+        """ duration below which the fraction `q` of durations lie """
+        rank = q * self.count
+        seen = 0
+        for bucket, n in enumerate(self.buckets):
+            seen += n
+            if n and seen >= rank:
+                return min(self.value(bucket), self.max)
+        return self.max
+
+    def stats(self):
+        """ dict with count, mean, p50, p95, p99 and max in nanoseconds """
+        return {'count': self.count, 'mean': self.mean,
+                'p50': self.quantile(.5), 'p95': self.quantile(.95),
+                'p99': self.quantile(.99), 'max': self.max}
+
+
+class Tracer:
+    """
+    in-memory ring buffer of trace events
+
+    Events are exported as Chrome Trace Event JSON (for chrome://tracing or
+    perfetto) with a track per process and thread, or as collapsed stacks
+    for flamegraphs.  Only the latest `size` events are kept.
+    """
+    def __init__(self, size=1 << 16):
+        self.events = deque(maxlen=size)
+        self.local = threading.local()
+        self.names = {}
+
+    def push(self, name):
+        """ put a name on the call stack of the current thread """
+        local = self.local
+        stack = getattr(local, 'stack', ()) + (name,)
+        local.stack = stack
+        return stack
+
+    def pop(self, stack):
+        self.local.stack = stack[:-1]
+
+    def complete(self, name, start, dur, stack=(), cat='span'):
+        """ record an event that took `dur` ns after `start` """
+        self.events.append(('X', name, cat, start, dur, os.getpid(),
+                            threading.get_ident(), stack))
+
+    def instant(self, name, cat='trace'):
+        """ record an event without duration """
+        self.events.append(('i', name, cat, time.perf_counter_ns(), 0,
+                            os.getpid(), threading.get_ident(), ()))
+
+    def clear(self):
+        self.events.clear()
+
+    def chrome(self):
+        """ events as a Chrome Trace Event JSON object """
+        import multiprocessing as mp
+        names = dict(self.names)
+        names[os.getpid(), None] = mp.current_process().name
+        for thread in threading.enumerate():
+            names[os.getpid(), thread.ident] = thread.name
+
+        events = []
+        for ph, name, cat, start, dur, pid, tid, stack in self.events:
+            event = {'ph': ph, 'name': name, 'cat': cat, 'ts': start / 1e3,
+                     'pid': pid, 'tid': tid, 'args': {'stack': list(stack)}}
+            if cat == 'async':
+                # coroutines interleave, so they are shown as async events
+                event.update(ph='b', id=start, tid=pid)
+                events.append(dict(event, ph='e', ts=(start + dur) / 1e3))
+            elif ph == 'X':
+                event['dur'] = dur / 1e3
+            else:
+                event['s'] = 't'
+            events.append(event)
+
+        for (pid, tid), name in names.items():
+            kind = 'process_name' if tid is None else 'thread_name'
+            events.append({'ph': 'M', 'name': kind, 'pid': pid,
+                           'tid': tid or 0, 'args': {'name': name}})
+        return {'traceEvents': events, 'displayTimeUnit': 'ns'}
+
+    def save(self, path):
+        """ write the events as chrome trace json """
+        import json
+        with open(path, 'w') as f:
+            json.dump(self.chrome(), f)
+
+    def load(self, *paths):
+        """ add events of chrome trace json files, e.g. of other processes """
+        import json
+        for path in paths:
+            with open(path) as f:
+                events = json.load(f)['traceEvents']
+            ends = {e['id']: e['ts'] for e in events if e['ph'] == 'e'}
+            for event in events:
+                ph, pid, tid = event['ph'], event['pid'], event['tid']
+                if ph == 'M':
+                    key = (pid, None if event['name'] == 'process_name'
+                           else tid)
+                    self.names[key] = event['args']['name']
+                elif ph in 'Xib':
+                    start = round(event['ts'] * 1e3)
+                    dur = round(event.get('dur', 0) * 1e3)
+                    if ph == 'b':
+                        dur = round(ends[event['id']] * 1e3) - start
+                        ph = 'X'
+                    self.events.append((ph, event['name'], event['cat'],
+                                        start, dur, pid, tid,
+                                        tuple(event['args']['stack'])))
+
+    def collapsed(self):
+        """ collapsed stacks with self time in us, as used by flamegraph.pl """
+        totals = defaultdict(int)
+        for ph, name, cat, start, dur, pid, tid, stack in self.events:
+            if ph == 'X':
+                totals[stack or (name,)] += dur
+        selfs = dict(totals)
+        for stack, dur in totals.items():
+            if stack[:-1] in selfs:
+                selfs[stack[:-1]] -= dur
+        return '\n'.join('{} {}'.format(';'.join(stack), max(0, ns // 1000))
+                         for stack, ns in sorted(selfs.items()))
+
+
+tracing = Tracer()
+
+
+def traced(f=None, *, name=None, tracer=None):
+    """
+    decorator recording calls of functions or coroutines as trace events
+
+    Events go to the module wide `tracing` ring buffer by default.  Calls
+    of functions are nested by thread, coroutines are recorded as async
+    events as they interleave.
+    """
+    if f is None:
+        return lambda f: traced(f, name=name, tracer=tracer)
+
+    import inspect
+
+    name = name or f.__qualname__
+    clock = time.perf_counter_ns
+
+    if inspect.iscoroutinefunction(f) or inspect.isgeneratorfunction(f):
+        @wraps(f)
+        def traced_co(*args, **kws):
+            start = clock()
+            try:
+                return (yield from f(*args, **kws))
+            finally:
+                (tracer or tracing).complete(name, start, clock() - start,
+                                             cat='async')
+        return types.coroutine(traced_co)
+
+    @wraps(f)
+    def traced_call(*args, **kws):
+        t = tracer or tracing
+        stack = t.push(name)
+        start = clock()
+        try:
+            return f(*args, **kws)
+        finally:
+            t.complete(name, start, clock() - start, stack, cat='call')
+            t.pop(stack)
+    return traced_call
+
+
+class Span:
+    """
+    node of a tree of timed spans, aggregating all runs in a histogram
+
+    Spans are created by `Timing.span`, entering one makes it the parent of
+    further spans of the timing inside the current thread or coroutine
+    context.  The same span may be entered concurrently, its start times are
+    kept with the context.
+    """
+    __slots__ = ('name', 'timing', 'parent', 'path', 'children', 'runs',
+                 '_hist', '_entered')
+
+    def __init__(self, name, timing, parent=None):
+        self.name = name
+        self.timing = timing
+        self.parent = parent
+        self.path = parent.path + (name,) if parent else ()
+        self.children = {}
+        self.runs = []
+        self._hist = Histogram()
+        self._entered = timing.entered
+
+    def fold(self):
+        """ aggregate the buffered runs into the histogram """
+        with self.timing.lock:
+            # only remove the folded runs, others may be appended meanwhile
+            runs = self.runs
+            count = len(runs)
+            self._hist.extend(runs[:count])
+            del runs[:count]
+
+    @property
+    def hist(self):
+        """ histogram of all runs of this span """
+        if self.runs:
+            self.fold()
+        return self._hist
+
+    def child(self, name):
+        try:
+            return self.children[name]
+        except KeyError:
+            return self.children.setdefault(name, Span(name, self.timing, self))
+
+    def __enter__(self):
+        entered = self._entered
+        entered.set((self, _clock(), entered.get()))
+        return self
+
+    def __exit__(self, typ, value, tb):
+        end = _clock()
+        entered = self._entered
+        _, start, outer = entered.get()
+        entered.set(outer)
+        # runs are buffered and only aggregated in batches
+        runs = self.runs
+        runs.append(end - start)
+        tracer = self.timing.tracer
+        if tracer is not None:
+            tracer.complete(self.name, start, end - start, self.path)
+        if len(runs) >= 4096:
+            self.fold()
+
+    def walk(self, depth=0):
+        """ iterate over (depth, span) of this and all nested spans """
+        yield depth, self
+        for child in self.children.values():
+            yield from child.walk(depth + 1)
+
+    def __repr__(self):
+        return 'span({})'.format('/'.join(self.path))
+
 
 class Timing:
-    def __init__(self, info=''):
+    """
+    timing of steps and nested spans, optionally recording them as trace
+    events into a `Tracer`
+
+    With `memory` set to 'tracemalloc' or 'rss' each trace step also
+    records a `MemStep` with the memory change and peak since the last step.
+    'tracemalloc' additionally records the top allocation sites, but slows
+    down allocations while the timing is running.
+    """
+    def __init__(self, info='', tracer=None, memory=None):
+        self.memory = memory
+        self.tracker = None
+        # (span, start, outer) of the innermost entered span per context
+        self.entered = contextvars.ContextVar('span', default=None)
+        # serializes folding the runs of spans into their histograms
+        self.lock = threading.Lock()
         self.reset()
         self.info = info
+        self.tracer = tracer
 
     def reset(self):
         self.traces = []
+        self.steps = []
         self.end = None
         self.start = time.time()
+        self.root = Span('', self)
+        self.entered.set(None)
+        if self.memory:
+            if self.tracker:
+                self.tracker.stop()
+            self.tracker = trackers[self.memory]()
 
     def trace(self, info='trace'):
         self.traces.append((info, time.time()))
+        if self.tracker:
+            self.steps.append(self.tracker.step())
+        if self.tracer is not None:
+            self.tracer.instant(info)
+
+    @property
+    def current(self):
+        """ innermost span entered in the current thread or coroutine """
+        entered = self.entered.get()
+        return self.root if entered is None else entered[0]
+
+    def memory_report(self):
+        """ textual report of memory and top allocation sites per step """
+        lines = []
+        for (info, _), step in zip(self.traces, self.steps):
+            lines.append('{}: {} (now {}, peak {})'.format(
+                info, step, format_bytes(step.current),
+                format_bytes(step.peak)))
+            for site, size in step.top:
+                lines.append('    {:>10} {}'.format(
+                    format_bytes(size), site))
+        return '\n'.join(lines)
+
+    def span(self, name):
+        """
+        nested span timed with `perf_counter_ns`, repeated runs of the same
+        span under the same parents are aggregated in its histogram
+
+        >>> with timing('pipeline') as t:
+        ...     for item in items:
+        ...         with t.span('load'):
+        ...             with t.span('parse'):
+        ...                 ...
+        >>> print(t.report())
+        """
+        entered = self.entered.get()
+        span = self.root if entered is None else entered[0]
+        try:
+            return span.children[name]
+        except KeyError:
+            return span.child(name)
+
+    def spans(self):
+        """ dict of span paths to their statistics """
+        return {span.path: span.hist.stats()
+                for _, span in self.root.walk() if span.parent}
+
+    def report(self):
+        """ textual report of the aggregated span statistics """
+        lines = ['{:<30} {:>8} {:>8} {:>8} {:>8} {:>8} {:>8}'.format(
+            self.info or 'span', 'count', 'mean', 'p50', 'p95', 'p99', 'max')]
+        for depth, span in self.root.walk(-1):
+            if span.parent is None:
+                continue
+            stats = span.hist.stats()
+            lines.append('{:<30} {:>8} {:>8} {:>8} {:>8} {:>8} {:>8}'.format(
+                '  ' * depth + span.name, stats.pop('count'),
+                *map(format_ns, stats.values())))
+        return '\n'.join(lines)
 
     def stop(self):
         self.end = time.time()
+        if self.tracker:
+            self.tracker.stop()
 
     def __str__(self):
         return 'timing(%s)' % self.info
@@ -23,15 +512,19 @@ class Timing:
     def __repr__(self):
         steps = ['{}:'.format(self.info)]
         last = self.start
-        for info, tr in self.traces:
-            steps.append('{}:{:.2f}'.format(info, tr-last))
+        mems = self.steps or [None] * len(self.traces)
+        for (info, tr), mem in zip(self.traces, mems):
+            if mem:
+                steps.append('{}:{:.2f}[{}]'.format(info, tr-last, mem))
+            else:
+                steps.append('{}:{:.2f}'.format(info, tr-last))
             last = tr
         return '..'.join(steps)
         
 
 @contextmanager
-def timing(info=''):
-    timing = Timing(info)
+def timing(info='', tracer=None, memory=None):
+    timing = Timing(info, tracer=tracer, memory=memory)
     try:
         yield timing
     finally:
@@ -8,6 +8,9 @@ setup(
     package_data = {
         '': ['*.txt', '*.rst'],
     },
+    extras_require = {
+        'batch': ['numpy'],
+    },
 
     # metadata for upload to PyPI
     author = "wabu",
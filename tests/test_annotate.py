@@ -0,0 +1,29 @@
+import asyncio
+
+from pyadds.annotate import initialized
+
+
+class Resources:
+    @initialized
+    def plain(self, **opts):
+        return 1
+
+    @initialized
+    def generator(self, **opts):
+        yield from asyncio.sleep(0)
+        return 2
+
+    @initialized
+    async def native(self, **opts):
+        return 3
+
+
+def test_initialized_definitions_are_coroutines():
+    obj = Resources()
+
+    async def main():
+        return [await desc.definition(obj)
+                for desc in (Resources.plain, Resources.generator,
+                             Resources.native)]
+
+    assert asyncio.run(main()) == [1, 2, 3]
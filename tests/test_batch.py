@@ -0,0 +1,36 @@
+import pytest
+
+np = pytest.importorskip('numpy')
+
+from pyadds.meta.ops import Batch, operate
+
+
+class Meter(operate('value')(float)):
+    def __init__(self, value):
+        self.value = value
+
+
+@pytest.fixture
+def meters():
+    return Batch.of(map(Meter, [1., 2., 3.]))
+
+
+def test_compare_selects_sub_batches(meters):
+    mask = meters > 1.5
+    assert mask.tolist() == [False, True, True]
+    assert [m.value for m in meters[mask]] == [2., 3.]
+
+
+def test_numeric_results_convert_back(meters):
+    doubled = meters * 2
+    assert isinstance(doubled, Batch)
+    assert isinstance(doubled[0], Meter)
+    assert [m.value for m in doubled] == [2., 4., 6.]
+    assert [m.value for m in -meters] == [-1., -2., -3.]
+
+
+def test_arrays_use_reflected_operators(meters):
+    result = np.array([1., 2., 3.]) + meters
+    assert isinstance(result, Batch)
+    assert result.values.dtype == np.float64
+    assert result.values.tolist() == [2., 4., 6.]
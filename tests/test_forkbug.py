@@ -0,0 +1,29 @@
+import os
+
+import pytest
+
+from pyadds import forkbug
+
+
+@pytest.fixture
+def isolated(monkeypatch, tmp_path):
+    monkeypatch.setattr(forkbug, 'fork_debug', True)
+    monkeypatch.setattr(forkbug, 'snapshot_dir', str(tmp_path / 'missing'))
+    monkeypatch.setattr(forkbug, 'debug_limit', (0, 60.))
+
+
+def test_failing_snapshot_keeps_exception(isolated):
+    with pytest.raises(ZeroDivisionError):
+        with forkbug.maybug(isolate=True):
+            1 / 0
+
+
+def test_failing_fork_keeps_exception(isolated, monkeypatch):
+    def fail():
+        raise OSError('no fork')
+    monkeypatch.setattr(forkbug, 'debug_limit', (1, 60.))
+    monkeypatch.setattr(os, 'fork', fail)
+    monkeypatch.setattr(forkbug, '_debug_forks', forkbug.deque())
+    with pytest.raises(ZeroDivisionError):
+        with forkbug.maybug(isolate=True):
+            1 / 0
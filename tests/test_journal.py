@@ -0,0 +1,68 @@
+import threading
+
+from pyadds import journal as journal_mod
+from pyadds.journal import Journal
+from pyadds.observe import Observable, emitting
+
+
+class Model(Observable):
+    @emitting
+    def set(self, key, value):
+        return value
+
+
+def test_record_and_replay(tmp_path):
+    model, other = Model(), Model()
+    with Journal(str(tmp_path)) as model.journal:
+        model.set('a', 1)
+        model.set('b', value=[2])
+    seen = []
+
+    class Observer:
+        def notify(self, event):
+            seen.append((event.__name__, event.key, event.value))
+    other.subscribe(Observer())
+    assert model.journal.replay(other) == 2
+    assert seen == [('set', 'a', 1), ('set', 'b', [2])]
+
+
+def test_failures_do_not_reach_the_caller(tmp_path, monkeypatch):
+    model = Model()
+    model.journal = Journal(str(tmp_path))
+    monkeypatch.setattr(journal_mod, 'header', None)
+    assert model.set('a', 1) == 1
+    assert model.journal.failed == 1
+
+
+def test_names_beyond_the_id_range_rotate(tmp_path, monkeypatch):
+    monkeypatch.setattr(journal_mod, 'max_names', 2)
+    journal = Journal(str(tmp_path))
+
+    class Event:
+        args, kws, result = (), {}, None
+
+    for name in 'abc':
+        event = Event()
+        event.__name__ = name
+        journal.record(event)
+    journal.close()
+    assert len(journal.segments()) == 2
+    assert [entry.name for entry in journal] == ['a', 'b', 'c']
+
+
+def test_concurrent_records(tmp_path):
+    model = Model()
+    model.journal = Journal(str(tmp_path))
+
+    def work(n):
+        for i in range(200):
+            model.set(n, i)
+    threads = [threading.Thread(target=work, args=(n,)) for n in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    entries = list(model.journal)
+    model.journal.close()
+    assert len(entries) == 800
+    assert model.journal.failed == 0
@@ -0,0 +1,127 @@
+import logging
+import pickle
+import queue
+import threading
+import time
+
+import pytest
+
+from pyadds.logging import (BoundedQueueHandler, PipeHandler, fields, log,
+                            queue_logging, record_fields, stop_queue_logging)
+
+
+class Pipe:
+    def __init__(self):
+        self.batches = queue.Queue()
+
+    def put(self, batch):
+        self.batches.put(pickle.loads(pickle.dumps(batch)))
+
+
+@pytest.fixture
+def logger():
+    logger = logging.getLogger('tests.logging')
+    logger.propagate = False
+    yield logger
+    logger.handlers = []
+    logger.propagate = True
+
+
+def test_pipe_handler_flushes_in_background(logger):
+    pipe = Pipe()
+    handler = PipeHandler(pipe, interval=.05)
+    logger.addHandler(handler)
+    try:
+        logger.warning('quiet %s', 'worker')
+        batch = pipe.batches.get(timeout=5)
+    finally:
+        handler.close()
+    assert [dct['msg'] for dct in batch] == ['quiet worker']
+
+
+def test_pipe_handler_sends_repr_of_unpicklable_extra(logger):
+    pipe = Pipe()
+    handler = PipeHandler(pipe)
+    logger.addHandler(handler)
+    lock = threading.Lock()
+    try:
+        logger.error('failed', extra={'lock': lock, 'plain': 1})
+        batch = pipe.batches.get(timeout=5)
+    finally:
+        handler.close()
+    assert batch[0]['lock'] == repr(lock)
+    assert batch[0]['plain'] == 1
+
+
+def test_pipe_handler_sends_evaluated_fields(logger):
+    pipe = Pipe()
+    handler = PipeHandler(pipe)
+    logger.addHandler(handler)
+    try:
+        logger.error('sized', extra=fields(size=lambda: 3))
+        batch = pipe.batches.get(timeout=5)
+    finally:
+        handler.close()
+    record = logging.makeLogRecord(batch[0])
+    assert record_fields(record) == {'size': 3}
+
+
+def test_queued_records_render_arguments_at_call_time(logger):
+    records = queue.Queue()
+    logger.addHandler(BoundedQueueHandler(records))
+    items = [1]
+    logger.warning('%s', items)
+    items.append(2)
+    assert records.get_nowait().getMessage() == '[1]'
+
+
+@log(queued=True)
+class QueuedWorker:
+    def work(self):
+        self.__log.warning('working')
+
+
+def test_queued_listener_starts_with_first_record():
+    handler, = [handler for handler in QueuedWorker.logger.handlers
+                if isinstance(handler, BoundedQueueHandler)]
+    try:
+        assert not handler.listening
+        QueuedWorker().work()
+        assert handler.listening
+    finally:
+        stop_queue_logging()
+    assert not handler.listening
+
+
+class Collect(logging.Handler):
+    def __init__(self, delay=0):
+        super().__init__()
+        self.delay = delay
+        self.records = []
+
+    def emit(self, record):
+        time.sleep(self.delay)
+        self.records.append(record)
+
+
+def test_queued_records_reach_handlers_of_parent_loggers():
+    parent = logging.getLogger(QueuedWorker.__module__)
+    collect = Collect()
+    parent.addHandler(collect)
+    try:
+        queue_logging()
+        QueuedWorker().work()
+    finally:
+        stop_queue_logging()
+        parent.removeHandler(collect)
+    assert [record.msg for record in collect.records] == ['working']
+
+
+def test_stop_queue_logging_waits_for_space_in_full_queue():
+    slow = Collect(delay=.01)
+    handler = queue_logging(slow, maxsize=5, overflow='drop')
+    for _ in range(50):
+        QueuedWorker().work()
+    stop_queue_logging()
+    assert not handler.listening
+    assert len(slow.records) + handler.dropped == 50
@@ -0,0 +1,66 @@
+import os
+import signal
+import time
+
+from pyadds.monitor import Monitor
+from pyadds.spawn import Spawner
+
+
+class Proc:
+    name = 'self'
+
+
+class Children:
+    def __init__(self):
+        self.children = {os.getpid(): (Proc(), None)}
+
+
+class Events:
+    def __init__(self):
+        self.events = []
+
+    def notify(self, event):
+        self.events.append(event)
+
+
+def test_exceeded_once_per_breach():
+    monitor = Monitor(Children(), rss=1)
+    events = Events()
+    monitor.subscribe(events)
+    for _ in range(3):
+        monitor.sample()
+    assert len(events.events) == 1
+
+    monitor.limits['rss'] = 1 << 60
+    monitor.sample()
+    monitor.limits['rss'] = 1
+    monitor.sample()
+    assert len(events.events) == 2
+
+
+def test_exceeded_for_each_limit():
+    monitor = Monitor(Children(), rss=1, fds=1)
+    events = Events()
+    monitor.subscribe(events)
+    monitor.sample()
+    assert len(events.events) == 2
+    assert monitor.breached == {(os.getpid(), 'rss'), (os.getpid(), 'fds')}
+
+
+class Stubborn:
+    def run(self):
+        signal.signal(signal.SIGTERM, signal.SIG_IGN)
+        time.sleep(60)
+
+
+def test_respawn_kills_stubborn_children():
+    spawner = Spawner(method='fork', aggregate_logs=False)
+    proc = spawner.spawn(Stubborn().run)
+    time.sleep(.5)
+    new = spawner.respawn(proc, timeout=.2)
+    try:
+        assert not proc.is_alive()
+        assert new.pid in spawner.children
+    finally:
+        new.kill()
+        new.join()
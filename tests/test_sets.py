@@ -0,0 +1,60 @@
+from pyadds.sets import Anything, BitSet, Complement, Symbols
+
+
+def test_plain_sets_are_not_interned():
+    symbols = Symbols(['a', 'b'])
+    ab = symbols('a', 'b')
+    assert ab != {'x'}
+    assert ab & {'y', 'a'} == symbols('a')
+    assert ab | {'z'} == frozenset({'a', 'b', 'z'})
+    assert not ab <= {'w'}
+    assert len(symbols) == 2
+
+
+def test_results_with_known_elements_are_bitsets():
+    symbols = Symbols(['a', 'b'])
+    assert isinstance(symbols('a', 'b') & {'a', 'x'}, BitSet)
+    assert isinstance(~symbols('a') | {'a', 'x'}, BitSet)
+
+
+def test_hash_matches_equal_plain_sets():
+    symbols = Symbols(['a', 'b'])
+    ab = symbols('a', 'b')
+    assert ab == frozenset({'a', 'b'})
+    assert hash(ab) == hash(frozenset({'a', 'b'}))
+    assert ~ab == Complement({'a', 'b'})
+    assert hash(~ab) == hash(Complement({'a', 'b'}))
+    assert symbols.anything == Anything
+    assert hash(symbols.anything) == hash(Anything)
+
+
+def test_bitsets_of_other_symbols_compare_by_elements():
+    ab = Symbols(['a', 'b'])('a', 'b')
+    ba = Symbols(['b', 'a'])('a', 'b')
+    assert ab == ba
+    assert hash(ab) == hash(ba)
+
+
+def test_complement_survives_pickling_and_copying():
+    import copy
+    import pickle
+    excluded = Complement({1, 2})
+    for clone in (pickle.loads(pickle.dumps(excluded)),
+                  copy.copy(excluded), copy.deepcopy(excluded)):
+        assert isinstance(clone, Complement)
+        assert clone == excluded
+        assert 1 not in clone
+    assert pickle.loads(pickle.dumps(Anything)) is Anything
+
+
+def test_method_forms_accept_iterables():
+    symbols = Symbols(['x', 'y'])
+    x = symbols('x')
+    assert Complement({1}).intersection(Anything) == Complement({1})
+    assert Complement({1}).issubset(Anything) is True
+    assert Complement({1}).issuperset(Anything) is False
+    assert x.union(['x']) == symbols('x')
+    assert x.union(['z']) == frozenset({'x', 'z'})
+    assert x.issubset(['x', 'q']) is True
+    assert Anything.intersection([1, 2]) == frozenset({1, 2})
+    assert Complement({1}).difference([2], {3}) == Complement({1, 2, 3})
@@ -0,0 +1,102 @@
+import os
+import pickle
+
+import pytest
+
+from pyadds.annotate import shared
+from pyadds.shared import SharedCache
+from pyadds.spawn import Spawner
+
+
+class Table:
+    def __init__(self, n):
+        self.n = n
+        self.computed = 0
+
+    @shared
+    def table(self):
+        self.computed += 1
+        return list(range(self.n))
+
+    def check(self, expected):
+        computed = self.computed
+        assert self.table == expected
+        assert self.computed == computed
+
+
+def test_values_are_per_instance():
+    a, b = Table(3), Table(5)
+    assert a.table == [0, 1, 2]
+    assert b.table == [0, 1, 2, 3, 4]
+    assert a.table == [0, 1, 2]
+    assert a.computed == b.computed == 1
+
+
+def test_pickled_copies_share_values():
+    a = Table(3)
+    a.table
+    copy = pickle.loads(pickle.dumps(a))
+    assert copy.table == [0, 1, 2]
+    assert copy.computed == 1
+
+
+def test_values_are_read_only():
+    a = Table(3)
+    with pytest.raises(AttributeError):
+        a.table = []
+    with pytest.raises(AttributeError):
+        del a.table
+
+
+def test_attach_waits_for_empty_segment():
+    cache = SharedCache()
+    path = os.path.join('/dev/shm', cache.segment('key'))
+    if not os.path.isdir('/dev/shm'):
+        pytest.skip('no /dev/shm')
+    open(path, 'wb').close()
+    cache.timeout = .05
+    try:
+        with pytest.raises(TimeoutError):
+            cache['key']
+    finally:
+        os.remove(path)
+        cache.close()
+
+
+@pytest.mark.parametrize('method', ['fork', 'spawn'])
+def test_children_attach_published_value(method):
+    table = Table(4)
+    table.table
+    spawner = Spawner(method=method, aggregate_logs=False)
+    try:
+        procs = [spawner.spawn(table.check, [0, 1, 2, 3]) for _ in range(2)]
+        for proc in procs:
+            proc.join(30)
+        assert [proc.exitcode for proc in procs] == [0, 0]
+    finally:
+        spawner.shutdown()
+
+
+def test_shutdown_keeps_values_of_other_spawners():
+    a, b = Table(2), Table(3)
+    a.table, b.table
+    first = Spawner(method='fork', aggregate_logs=False)
+    second = Spawner(method='fork', aggregate_logs=False)
+    try:
+        procs = [first.spawn(a.check, [0, 1]),
+                 second.spawn(b.check, [0, 1, 2])]
+        for proc in procs:
+            proc.join(30)
+        first.shutdown()
+        closed, kept = (first.shared.segment('{}.table'.format(
+            Table.table.key(obj))) for obj in (a, b))
+        assert not os.path.exists(os.path.join('/dev/shm', closed))
+        assert os.path.exists(os.path.join('/dev/shm', kept))
+        b.check([0, 1, 2])
+
+        proc = second.spawn(b.check, [0, 1, 2])
+        proc.join(30)
+        assert [proc.exitcode for proc in procs] + [proc.exitcode] == [0] * 3
+    finally:
+        first.shutdown()
+        second.shutdown()
@@ -0,0 +1,38 @@
+import logging
+import os
+
+import pytest
+
+from pyadds.spawn import Spawner
+
+
+class Records(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+class Worker:
+    def run(self, text):
+        logging.getLogger('tests.spawn').warning('%s from %s', text, os.getpid())
+
+
+@pytest.mark.parametrize('method', ['fork', 'spawn'])
+def test_child_logs_reach_parent(method):
+    logger = logging.getLogger('tests.spawn')
+    handler = Records()
+    logger.addHandler(handler)
+    spawner = Spawner(method=method)
+    try:
+        proc = spawner.spawn(Worker().run, 'hello')
+        proc.join(30)
+        assert proc.exitcode == 0
+    finally:
+        spawner.shutdown()
+        logger.removeHandler(handler)
+
+    messages = [(r.getMessage(), r.process) for r in handler.records]
+    assert ('hello from {}'.format(proc.pid), proc.pid) in messages
@@ -0,0 +1,101 @@
+import asyncio
+import os
+import threading
+import time
+
+import pytest
+
+from pyadds.timing import Timing
+
+
+def test_spans_nest_per_thread():
+    timing = Timing()
+
+    def work():
+        for _ in range(500):
+            with timing.span('a'):
+                with timing.span('b'):
+                    time.sleep(0)
+
+    threads = [threading.Thread(target=work) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    spans = timing.spans()
+    assert sorted(spans) == [('a',), ('a', 'b')]
+    assert spans['a',]['count'] == spans['a', 'b']['count'] == 2000
+    assert timing.current is timing.root
+
+
+def test_spans_nest_per_coroutine():
+    timing = Timing()
+
+    async def work(name):
+        with timing.span(name):
+            await asyncio.sleep(.01)
+            with timing.span('inner'):
+                await asyncio.sleep(.01)
+
+    async def main():
+        await asyncio.gather(work('a'), work('b'))
+
+    asyncio.run(main())
+    spans = timing.spans()
+    assert sorted(spans) == [('a',), ('a', 'inner'), ('b',), ('b', 'inner')]
+    assert spans['a',]['max'] >= 20e6 * .9
+
+
+def test_runs_are_folded_once_while_threads_exit_spans():
+    timing = Timing()
+    span = timing.span('a')
+
+    def work():
+        for _ in range(20000):
+            with span:
+                pass
+            if not _ % 1000:
+                span.hist
+
+    threads = [threading.Thread(target=work) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert span.hist.count == 160000
+
+
+def test_rss_steps_record_peak_per_step():
+    if not os.path.exists('/proc/self/statm'):
+        pytest.skip('no /proc')
+    size = 64 << 20
+    timing = Timing(memory='rss')
+    data = b'x' * size
+    timing.trace('alloc')
+    del data
+    timing.trace('free')
+    timing.trace('idle')
+    timing.stop()
+
+    alloc, free, idle = timing.steps
+    assert alloc.delta > size // 2
+    assert free.delta < -size // 2
+    if timing.tracker.resettable:
+        assert idle.peak < alloc.peak - size // 2
+
+
+def test_tracemalloc_steps_record_allocation_sites():
+    import tracemalloc
+    timing = Timing(memory='tracemalloc')
+    data = [bytes(1000) for _ in range(1000)]
+    timing.trace('alloc')
+    timing.stop()
+
+    step, = timing.steps
+    assert step.delta >= 1000 * 1000
+    assert step.peak >= step.current
+    assert any(__file__ in site for site, _ in step.top)
+    assert not tracemalloc.is_tracing()
+    assert 'alloc: +' in timing.memory_report()
+    del data